@@ -1,10 +1,13 @@
 """Claude Agent SDK client wrapper with multi-turn session support."""
 
+import asyncio
 import logging
-from collections.abc import AsyncIterator
-from dataclasses import dataclass
-from typing import Any
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import aclosing, suppress
+from dataclasses import dataclass, replace
+from typing import Any, TypeVar
 
+import orjson
 from claude_agent_sdk import (
     AssistantMessage,
     ClaudeAgentOptions,
@@ -22,8 +25,13 @@ from src.services.sessions import ManagedSession, SessionManager, SessionState
 
 logger = logging.getLogger(__name__)
 
+_H = TypeVar("_H")
 
-@dataclass
+# Max events buffered between the SDK reader task and the downstream consumer
+EVENT_QUEUE_SIZE = 32
+
+
+@dataclass(slots=True, frozen=True)
 class StreamEvent:
     """Event emitted during agent response streaming."""
 
@@ -39,6 +47,18 @@ class StreamEvent:
     questions: list[dict[str, Any]] | None = None  # For AskUserQuestion
 
 
+def serialize_tool_content(content: str | list[dict[str, Any]] | None) -> str:
+    """Serialize ToolResultBlock content to a string for streaming.
+
+    Strings pass through unchanged; structured content is encoded as JSON.
+    """
+    if isinstance(content, str):
+        return content
+    if content is None:
+        return ""
+    return orjson.dumps(content).decode()
+
+
 class AgentManager:
     """Manages Claude Agent SDK sessions with multi-turn support.
 
@@ -48,14 +68,18 @@ class AgentManager:
 
     def __init__(self) -> None:
         """Initialize the agent manager with a session manager."""
-        self.session_manager = SessionManager(ttl_seconds=settings.session_ttl_seconds)
+        self.session_manager = SessionManager(
+            ttl_seconds=settings.session_ttl_seconds,
+            pool_size=settings.client_pool_size,
+            max_sessions=settings.max_sessions,
+        )
 
     async def stream_response(
         self,
         prompt: str,
         session_id: str | None = None,
         options: ClaudeAgentOptions | None = None,
-    ) -> AsyncIterator[StreamEvent]:
+    ) -> AsyncGenerator[StreamEvent, None]:
         """Stream response from existing or new session.
 
         Args:
@@ -68,68 +92,69 @@ class AgentManager:
         """
         session: ManagedSession | None = None
 
-        logger.info(f"[stream_response] Received request with session_id={session_id}")
+        logger.info("[stream_response] Received request with session_id=%s", session_id)
 
         # Try to get existing session
         if session_id:
             session = await self.session_manager.get_session(session_id)
             if session is None:
-                logger.info(f"[stream_response] Session {session_id} not found, creating new")
+                logger.info("[stream_response] Session %s not found, creating new", session_id)
             else:
                 logger.info(
-                    f"[stream_response] Found existing session {session_id}, state={session.state}"
+                    "[stream_response] Found existing session %s, state=%s",
+                    session_id,
+                    session.state,
                 )
 
         # Create new session if needed
         if session is None:
             opts = options or get_default_options()
             session = await self.session_manager.create_session(opts)
-            logger.info(f"[stream_response] Created new session {session.session_id}")
-        elif session.sdk_session_id != "default":
-            # For multi-turn: reconnect the client with resume option to continue
-            # conversation. Works around SDK limitation where receive_response()
-            # can only be iterated once.
-            logger.info(f"[stream_response] Reconnecting with resume={session.sdk_session_id}")
-            await session.client.disconnect()
-            from dataclasses import replace
-
-            resumed_opts = replace(session.options, resume=session.sdk_session_id)
-            from claude_agent_sdk import ClaudeSDKClient
-
-            session.client = ClaudeSDKClient(options=resumed_opts)
-            await session.client.connect()
-            logger.info("[stream_response] Client reconnected with resume option")
+            logger.info("[stream_response] Created new session %s", session.session_id)
 
-        # Update session state
-        await self.session_manager.set_session_state(session.session_id, SessionState.STREAMING)
+        async with aclosing(self._query_session(session, prompt, "stream_response")) as events:
+            async for event in events:
+                yield event
 
-        try:
-            # Send query to the client
-            logger.info(f"[stream_response] Sending query to session {session.session_id}")
-            await session.client.query(prompt)
-            logger.info("[stream_response] Query sent, starting to receive response")
+    async def resume_session(
+        self,
+        sdk_session_id: str,
+        prompt: str,
+        options: ClaudeAgentOptions | None = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Resume a known SDK conversation in a fresh managed session.
 
-            # Stream the response
-            async for event in self._process_response(session):
-                yield event
+        Used when the SDK session ID is known (e.g. persisted by the caller)
+        but its managed session has expired or lives in another process.
+        The client is started with ``resume`` so the CLI restores the
+        conversation itself instead of replaying history in the prompt.
 
-            logger.info(f"[stream_response] Response complete for session {session.session_id}")
+        Args:
+            sdk_session_id: The SDK session ID from a previous ``done`` event.
+            prompt: The user's message/prompt.
+            options: Optional custom options to resume with.
 
-        except Exception as e:
-            logger.error(f"Error in session {session.session_id}: {e}")
-            await self.session_manager.set_session_state(session.session_id, SessionState.ERROR)
-            yield StreamEvent(
-                type="error",
-                text=str(e),
-                is_error=True,
-                session_id=session.session_id,
-            )
+        Yields:
+            StreamEvent objects for the resumed conversation.
+        """
+        opts = replace(options or get_default_options(), resume=sdk_session_id)
+        session = await self.session_manager.create_session(opts)
+        session.sdk_session_id = sdk_session_id
+        logger.info(
+            "[resume_session] Created session %s resuming sdk_session_id=%s",
+            session.session_id,
+            sdk_session_id,
+        )
+
+        async with aclosing(self._query_session(session, prompt, "resume_session")) as events:
+            async for event in events:
+                yield event
 
     async def respond_to_prompt(
         self,
         session_id: str,
         response: str,
-    ) -> AsyncIterator[StreamEvent]:
+    ) -> AsyncGenerator[StreamEvent, None]:
         """Continue session with user response to AskUserQuestion.
 
         Args:
@@ -146,120 +171,253 @@ class AgentManager:
         if session is None:
             raise SessionNotFoundError(f"Session {session_id} not found")
 
+        async with aclosing(self._query_session(session, response, "respond_to_prompt")) as events:
+            async for event in events:
+                yield event
+
+    async def _query_session(
+        self,
+        session: ManagedSession,
+        prompt: str,
+        caller: str,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Send prompt on the session's client and stream the response.
+
+        Args:
+            session: The session to query.
+            prompt: The message to send.
+            caller: Name of the public entry point, used as the log prefix.
+
+        If the response is not read through to its result (the consumer
+        closed the stream early or an error occurred), the session's client
+        is replaced by one resuming the conversation, since it may still
+        hold the rest of the response.
+
+        Yields:
+            StreamEvent objects for the response, or a single error event.
+        """
         # Update session state
         await self.session_manager.set_session_state(session.session_id, SessionState.STREAMING)
 
+        completed = False
         try:
-            # Send the user's response with SDK session ID for multi-turn
-            logger.info(
-                f"[respond_to_prompt] Sending to session {session.session_id} "
-                f"(sdk_session_id={session.sdk_session_id})"
+            # Send query on the long-lived client; the SDK session ID keeps
+            # multi-turn context without reconnecting the client per turn
+            logger.debug(
+                "[%s] Sending query to session %s (sdk_session_id=%s)",
+                caller,
+                session.session_id,
+                session.sdk_session_id,
             )
-            await session.client.query(response, session_id=session.sdk_session_id)
-            logger.info("[respond_to_prompt] Response sent, receiving response")
+            await session.client.query(prompt, session_id=session.sdk_session_id)
+            logger.debug("[%s] Query sent, starting to receive response", caller)
 
-            # Stream the response
-            async for event in self._process_response(session):
-                yield event
+            # Stream the response; closing it early cancels the SDK reader
+            async with aclosing(self._process_response(session)) as events:
+                async for event in events:
+                    yield event
 
-            logger.info(f"[respond_to_prompt] Complete for session {session.session_id}")
+            completed = True
+            logger.info("[%s] Response complete for session %s", caller, session.session_id)
 
         except Exception as e:
-            logger.error(f"Error in session {session.session_id}: {e}")
-            await self.session_manager.set_session_state(session.session_id, SessionState.ERROR)
+            logger.error("Error in session %s: %s", session.session_id, e)
             yield StreamEvent(
                 type="error",
                 text=str(e),
                 is_error=True,
                 session_id=session.session_id,
             )
+        finally:
+            if not completed:
+                # Shielded so a cancelled request still swaps the client
+                logger.info("[%s] Reconnecting unfinished session %s", caller, session.session_id)
+                await asyncio.shield(self.session_manager.reconnect_session(session.session_id))
 
     def _create_tool_result_event(self, block: ToolResultBlock, session_id: str) -> StreamEvent:
         """Create a StreamEvent from a ToolResultBlock."""
         return StreamEvent(
             type="tool_result",
             tool_id=block.tool_use_id,
-            tool_result=block.content if isinstance(block.content, str) else str(block.content),
+            tool_result=serialize_tool_content(block.content),
             is_error=block.is_error or False,
             session_id=session_id,
         )
 
-    async def _process_response(self, session: ManagedSession) -> AsyncIterator[StreamEvent]:
+    def _tool_use_block_event(
+        self, block: ToolUseBlock, session_id: str, ask_user_question_ids: set[str]
+    ) -> StreamEvent:
+        """Create a tool_start or user_input_required StreamEvent from a ToolUseBlock."""
+        if block.name == "AskUserQuestion":
+            # Track this tool ID to skip its result
+            ask_user_question_ids.add(block.id)
+            return StreamEvent(
+                type="user_input_required",
+                tool_name=block.name,
+                tool_id=block.id,
+                tool_input=block.input,
+                questions=block.input.get("questions"),
+                session_id=session_id,
+            )
+        return StreamEvent(
+            type="tool_start",
+            tool_name=block.name,
+            tool_id=block.id,
+            tool_input=block.input,
+            session_id=session_id,
+        )
+
+    async def _handle_assistant_message(
+        self,
+        session: ManagedSession,
+        message: AssistantMessage,
+        ask_user_question_ids: set[str],
+    ) -> AsyncIterator[StreamEvent]:
+        """Yield StreamEvents for each content block of an AssistantMessage.
+
+        Adjacent text blocks are coalesced into a single text event so the
+        stream does one round trip per run of text rather than per block.
+        """
+        session_id = session.session_id
+        text_buf: list[str] = []
+        for block in message.content:
+            # Text is by far the most common block, so check its exact type
+            # first; subclasses fall back to isinstance
+            if type(block) is TextBlock or isinstance(block, TextBlock):
+                text_buf.append(block.text)
+                continue
+            if isinstance(block, ToolUseBlock):
+                event = self._tool_use_block_event(block, session_id, ask_user_question_ids)
+            elif isinstance(block, ToolResultBlock):
+                event = self._create_tool_result_event(block, session_id)
+            else:
+                continue
+
+            if text_buf:
+                yield StreamEvent(type="text", text="".join(text_buf), session_id=session_id)
+                text_buf.clear()
+            if event.type == "user_input_required":
+                await self.session_manager.set_session_state(session_id, SessionState.WAITING_INPUT)
+            yield event
+
+        if text_buf:
+            yield StreamEvent(type="text", text="".join(text_buf), session_id=session_id)
+
+    async def _handle_user_message(
+        self,
+        session: ManagedSession,
+        message: UserMessage,
+        ask_user_question_ids: set[str],
+    ) -> AsyncIterator[StreamEvent]:
+        """Yield tool_result StreamEvents from a UserMessage.
+
+        UserMessage contains tool results from Claude Code SDK.
+        """
+        session_id = session.session_id
+        create_event = self._create_tool_result_event
+        for user_block in message.content:
+            if isinstance(user_block, ToolResultBlock):
+                # Skip tool results for AskUserQuestion (handled by frontend)
+                if user_block.tool_use_id in ask_user_question_ids:
+                    continue
+                yield create_event(user_block, session_id)
+
+    async def _handle_result_message(
+        self,
+        session: ManagedSession,
+        message: ResultMessage,
+        ask_user_question_ids: set[str],
+    ) -> AsyncIterator[StreamEvent]:
+        """Record the SDK session ID and yield the final done StreamEvent."""
+        # Save SDK session ID for multi-turn conversations
+        if message.session_id:
+            logger.debug("[_handle_result_message] Saving SDK session_id: %s", message.session_id)
+            session.sdk_session_id = message.session_id
+
+        # Determine final state based on result
+        final_state = SessionState.ERROR if message.is_error else SessionState.ACTIVE
+
+        await self.session_manager.set_session_state(session.session_id, final_state)
+
+        yield StreamEvent(
+            type="done",
+            session_id=session.session_id,
+            cost=message.total_cost_usd,
+            is_error=message.is_error,
+        )
+
+    async def _process_response(self, session: ManagedSession) -> AsyncGenerator[StreamEvent, None]:
         """Process messages from the client and yield StreamEvents.
 
+        A producer task drains the SDK response into a bounded queue while
+        this generator hands events downstream, so receiving from the SDK
+        overlaps with serializing and writing earlier events.
+
         Args:
             session: The active session.
 
         Yields:
             StreamEvent objects for each message component.
         """
-        # Track AskUserQuestion tool IDs to skip their results
-        ask_user_question_ids: set[str] = set()
+        queue: asyncio.Queue[StreamEvent | None] = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        producer = asyncio.create_task(self._drain_response(session, queue))
+        get = queue.get
+        try:
+            while (event := await get()) is not None:
+                yield event
+            # Re-raise any error from the producer
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                with suppress(asyncio.CancelledError):
+                    await producer
+
+    async def _drain_response(
+        self, session: ManagedSession, queue: asyncio.Queue[StreamEvent | None]
+    ) -> None:
+        """Put every StreamEvent of the response on the queue, then None."""
+        try:
+            async with aclosing(self._iter_response(session)) as events:
+                async for event in events:
+                    await queue.put(event)
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    async def _iter_response(self, session: ManagedSession) -> AsyncGenerator[StreamEvent, None]:
+        """Dispatch SDK messages and yield the resulting StreamEvents.
+
+        Messages are dispatched on their exact type through ``_MESSAGE_HANDLERS``
+        so the streaming loop avoids an ``isinstance`` cascade per message.
+
+        Args:
+            session: The active session.
 
-        logger.info(f"[_process_response] Starting receive_response() for {session.session_id}")
+        Yields:
+            StreamEvent objects for each message component.
+        """
+        # Track AskUserQuestion tool IDs to skip their results, reusing the
+        # session's set rather than allocating one per response
+        ask_user_question_ids = session.ask_user_question_ids
+        ask_user_question_ids.clear()
+
+        logger.debug("[_iter_response] Starting receive_response() for %s", session.session_id)
+        # Bind loop-invariant lookups once; the debug level is fixed for a response
+        debug = logger.isEnabledFor(logging.DEBUG)
+        message_handlers = _MESSAGE_HANDLERS
+        touch = self.session_manager.touch_session
         async for message in session.client.receive_response():
-            logger.info(f"[_process_response] Received message type: {type(message).__name__}")
-            if isinstance(message, AssistantMessage):
-                for block in message.content:
-                    if isinstance(block, TextBlock):
-                        yield StreamEvent(
-                            type="text",
-                            text=block.text,
-                            session_id=session.session_id,
-                        )
-                    elif isinstance(block, ToolUseBlock):
-                        # Check for AskUserQuestion tool
-                        if block.name == "AskUserQuestion":
-                            # Track this tool ID to skip its result
-                            ask_user_question_ids.add(block.id)
-                            await self.session_manager.set_session_state(
-                                session.session_id, SessionState.WAITING_INPUT
-                            )
-                            yield StreamEvent(
-                                type="user_input_required",
-                                tool_name=block.name,
-                                tool_id=block.id,
-                                tool_input=block.input,
-                                questions=block.input.get("questions"),
-                                session_id=session.session_id,
-                            )
-                        else:
-                            yield StreamEvent(
-                                type="tool_start",
-                                tool_name=block.name,
-                                tool_id=block.id,
-                                tool_input=block.input,
-                                session_id=session.session_id,
-                            )
-                    elif isinstance(block, ToolResultBlock):
-                        yield self._create_tool_result_event(block, session.session_id)
-
-            elif isinstance(message, UserMessage):
-                # UserMessage contains tool results from Claude Code SDK
-                for user_block in message.content:
-                    if isinstance(user_block, ToolResultBlock):
-                        # Skip tool results for AskUserQuestion (handled by frontend)
-                        if user_block.tool_use_id in ask_user_question_ids:
-                            continue
-                        yield self._create_tool_result_event(user_block, session.session_id)
-
-            elif isinstance(message, ResultMessage):
-                # Save SDK session ID for multi-turn conversations
-                if message.session_id:
-                    logger.info(f"[_process_response] Saving SDK session_id: {message.session_id}")
-                    session.sdk_session_id = message.session_id
-
-                # Determine final state based on result
-                final_state = SessionState.ERROR if message.is_error else SessionState.ACTIVE
-
-                await self.session_manager.set_session_state(session.session_id, final_state)
-
-                yield StreamEvent(
-                    type="done",
-                    session_id=session.session_id,
-                    cost=message.total_cost_usd,
-                    is_error=message.is_error,
-                )
+            # Keep long but progressing turns from looking stale to eviction
+            touch(session)
+            if debug:
+                logger.debug("[_iter_response] Received message type: %s", type(message).__name__)
+            handler = _lookup_handler(message_handlers, message)
+            if handler is None:
+                continue
+            async for event in handler(self, session, message, ask_user_question_ids):
+                yield event
 
     async def delete_session(self, session_id: str) -> bool:
         """Delete a session explicitly.
@@ -277,6 +435,28 @@ class AgentManager:
         await self.session_manager.cleanup_all()
 
 
+_MessageHandler = Callable[
+    [AgentManager, ManagedSession, Any, set[str]], AsyncIterator[StreamEvent]
+]
+
+# Dispatch table keyed by exact SDK type; subclasses fall back to isinstance
+_MESSAGE_HANDLERS: dict[type[Any], _MessageHandler] = {
+    AssistantMessage: AgentManager._handle_assistant_message,
+    UserMessage: AgentManager._handle_user_message,
+    ResultMessage: AgentManager._handle_result_message,
+}
+
+
+def _lookup_handler(table: dict[type[Any], _H], obj: object) -> _H | None:
+    """Find the handler for obj by exact type, falling back to isinstance."""
+    handler = table.get(type(obj))
+    if handler is None:
+        for cls, candidate in table.items():
+            if isinstance(obj, cls):
+                return candidate
+    return handler
+
+
 # Keep AgentRunner as an alias for backward compatibility with tests
 class AgentRunner(AgentManager):
     """Deprecated: Use AgentManager instead.
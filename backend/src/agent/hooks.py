@@ -1,6 +1,8 @@
 """Custom hooks for agent tool validation and logging."""
 
 import logging
+import re
+from functools import lru_cache
 from typing import Any, Literal, cast
 
 from claude_agent_sdk import (
@@ -17,6 +19,26 @@ HookEventName = Literal[
     "PreToolUse", "PostToolUse", "UserPromptSubmit", "Stop", "SubagentStop", "PreCompact"
 ]
 
+# Shared no-op hook result; the SDK copies hook output and never mutates it
+_EMPTY_HOOK_OUTPUT: HookJSONOutput = {}
+
+# Dangerous bash command patterns to block
+DANGEROUS_PATTERNS: tuple[str, ...] = (
+    "rm -rf /",
+    "rm -rf ~",
+    "sudo rm",
+    "> /dev/sda",
+    "mkfs.",
+    "dd if=",
+    ":(){:|:&};:",  # Fork bomb
+)
+
+# Single alternation so a command is scanned once instead of once per pattern
+_DANGEROUS_RE = re.compile("|".join(re.escape(pattern) for pattern in DANGEROUS_PATTERNS))
+
+# Tools whose PostToolUse events are recorded in the audit trail
+_WRITE_TOOLS: frozenset[str] = frozenset({"Write", "Edit"})
+
 
 async def log_tool_usage(
     input_data: HookInput,
@@ -25,8 +47,8 @@ async def log_tool_usage(
 ) -> HookJSONOutput:
     """Log all tool usage for analytics and debugging."""
     tool_name = input_data.get("tool_name", "unknown")
-    logger.info(f"Tool used: {tool_name}, ID: {tool_use_id}")
-    return {}
+    logger.info("Tool used: %s, ID: %s", tool_name, tool_use_id)
+    return _EMPTY_HOOK_OUTPUT
 
 
 async def validate_bash_commands(
@@ -36,33 +58,25 @@ async def validate_bash_commands(
 ) -> HookJSONOutput:
     """Validate bash commands for safety, blocking dangerous patterns."""
     if input_data.get("tool_name") != "Bash":
-        return {}
+        return _EMPTY_HOOK_OUTPUT
 
     tool_input = cast(dict[str, Any], input_data.get("tool_input") or {})
     command = tool_input.get("command", "")
+    if not command:
+        return _EMPTY_HOOK_OUTPUT
 
     # Block dangerous patterns
-    dangerous_patterns = [
-        "rm -rf /",
-        "rm -rf ~",
-        "sudo rm",
-        "> /dev/sda",
-        "mkfs.",
-        "dd if=",
-        ":(){:|:&};:",  # Fork bomb
-    ]
-
-    for pattern in dangerous_patterns:
-        if pattern in command:
-            return {
-                "hookSpecificOutput": {
-                    "hookEventName": "PreToolUse",
-                    "permissionDecision": "deny",
-                    "permissionDecisionReason": (f"Dangerous command pattern blocked: {pattern}"),
-                }
+    match = _DANGEROUS_RE.search(command)
+    if match:
+        return {
+            "hookSpecificOutput": {
+                "hookEventName": "PreToolUse",
+                "permissionDecision": "deny",
+                "permissionDecisionReason": (f"Dangerous command pattern blocked: {match.group()}"),
             }
+        }
 
-    return {}
+    return _EMPTY_HOOK_OUTPUT
 
 
 async def track_file_changes(
@@ -73,17 +87,20 @@ async def track_file_changes(
     """Track file modifications for audit trail."""
     tool_name = input_data.get("tool_name")
 
-    if tool_name in ["Write", "Edit"]:
+    if tool_name in _WRITE_TOOLS:
         tool_input = cast(dict[str, Any], input_data.get("tool_input") or {})
         file_path = tool_input.get("file_path", "")
-        logger.info(f"File modified: {file_path}")
+        logger.info("File modified: %s", file_path)
 
-    return {}
+    return _EMPTY_HOOK_OUTPUT
 
 
+@lru_cache(maxsize=1)
 def create_hooks() -> dict[HookEventName, list[HookMatcher]]:
     """Create hooks configuration for agent sessions.
 
+    The configuration is built once and shared; callers must not mutate it.
+
     Returns:
         Dictionary mapping hook event names to matchers.
     """
@@ -1,5 +1,7 @@
 """Agent configuration options."""
 
+from functools import lru_cache
+
 from claude_agent_sdk import ClaudeAgentOptions
 from claude_agent_sdk.types import McpServerConfig
 
@@ -7,12 +9,32 @@ from src.agent.hooks import create_hooks
 from src.config import settings
 from src.tools.server import create_tools_server
 
+# Base allowed tools
+BASE_ALLOWED_TOOLS: tuple[str, ...] = (
+    "Read",
+    "Write",
+    "Edit",
+    "Bash",
+    "Glob",
+    "Grep",
+    "WebSearch",
+    "WebFetch",
+    "Task",
+)
+
+# Custom tool names (prefixed with mcp__<server>__)
+CUSTOM_TOOL_NAMES: tuple[str, ...] = ("mcp__tools__echo",)
+
 
+@lru_cache(maxsize=4)
 def get_default_options(
     *, include_hooks: bool = False, include_custom_tools: bool = False
 ) -> ClaudeAgentOptions:
     """Create default agent options.
 
+    The result is cached per flag combination and shared between sessions,
+    so callers must not mutate it; use ``dataclasses.replace`` instead.
+
     Args:
         include_hooks: Whether to include hooks for logging and validation.
         include_custom_tools: Whether to include custom MCP tools.
@@ -20,22 +42,9 @@ def get_default_options(
     Returns:
         Configured ClaudeAgentOptions.
     """
-    # Base allowed tools
-    allowed_tools = [
-        "Read",
-        "Write",
-        "Edit",
-        "Bash",
-        "Glob",
-        "Grep",
-        "WebSearch",
-        "WebFetch",
-        "Task",
-    ]
-
-    # Add custom tool names (prefixed with mcp__<server>__)
+    allowed_tools = list(BASE_ALLOWED_TOOLS)
     if include_custom_tools:
-        allowed_tools.append("mcp__tools__echo")
+        allowed_tools.extend(CUSTOM_TOOL_NAMES)
 
     # Configure MCP servers
     mcp_servers: dict[str, McpServerConfig] = {}
@@ -53,6 +53,6 @@ Use Python for data processing and visualization.
 
 
 # Tool sets for different agent types
-RESEARCH_TOOLS = ["WebSearch", "WebFetch", "Read", "Glob", "Grep"]
-CODE_ANALYST_TOOLS = ["Read", "Glob", "Grep"]
-DATA_ANALYST_TOOLS = ["Read", "Write", "Bash"]
+RESEARCH_TOOLS: tuple[str, ...] = ("WebSearch", "WebFetch", "Read", "Glob", "Grep")
+CODE_ANALYST_TOOLS: tuple[str, ...] = ("Read", "Glob", "Grep")
+DATA_ANALYST_TOOLS: tuple[str, ...] = ("Read", "Write", "Bash")
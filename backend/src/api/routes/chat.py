@@ -15,11 +15,13 @@ Stream codes:
 - e: finish_step (object with finishReason, usage, isContinued)
 """
 
-import json
-import uuid
-from collections.abc import AsyncIterator
+import secrets
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Mapping
+from contextlib import aclosing
+from types import MappingProxyType
 from typing import Any
 
+import orjson
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
@@ -29,18 +31,29 @@ from src.agent.exceptions import SessionNotFoundError
 
 router = APIRouter()
 
+# Bound once; called for every part of every streamed event
+_dumps = orjson.dumps
 
-def get_sse_headers(session_id: str | None = None) -> dict[str, str]:
-    """Get SSE headers for Data Stream protocol."""
-    headers = {
+
+# Read-only view so the shared instance can be returned without copying
+_BASE_SSE_HEADERS: Mapping[str, str] = MappingProxyType(
+    {
         "Cache-Control": "no-cache",
         "Connection": "keep-alive",
         "X-Accel-Buffering": "no",
         "Content-Type": "text/plain; charset=utf-8",
     }
-    if session_id:
-        headers["x-session-id"] = session_id
-    return headers
+)
+
+
+def get_sse_headers(session_id: str | None = None) -> Mapping[str, str]:
+    """Get SSE headers for Data Stream protocol.
+
+    Without a session ID the shared base headers are returned as-is.
+    """
+    if not session_id:
+        return _BASE_SSE_HEADERS
+    return {**_BASE_SSE_HEADERS, "x-session-id": session_id}
 
 
 # Module-level singleton for agent manager
@@ -50,28 +63,164 @@ _agent_manager: AgentManager | None = None
 class DataStreamState:
     """Tracks state for Data Stream protocol conversion."""
 
+    __slots__ = ("session_id",)
+
     def __init__(self) -> None:
         self.session_id: str | None = None
 
     def generate_tool_id(self) -> str:
         """Generate a new tool call ID."""
-        return f"call-{uuid.uuid4().hex[:12]}"
+        return f"call-{secrets.token_hex(6)}"
 
 
-def format_data_stream_part(code: str, value: Any) -> str:
+def format_data_stream_part(code: bytes, value: Any) -> bytes:
     """Format a single Data Stream part.
 
+    Parts are built as UTF-8 bytes so StreamingResponse can write them
+    without re-encoding.
+
     Args:
         code: Single character code (0, 2, 3, 9, a, b, c, d, e).
         value: JSON-serializable value.
 
     Returns:
-        Formatted string like "0:\"Hello\"\n".
+        Formatted bytes like b"0:\"Hello\"\n".
     """
-    return f"{code}:{json.dumps(value)}\n"
+    return code + b":" + _dumps(value) + b"\n"
+
+
+# Finish parts carry no per-response data, so they are encoded once.
+# Finish step: code e
+FINISH_STEP_PART = format_data_stream_part(
+    b"e",
+    {
+        "finishReason": "stop",
+        "usage": {"promptTokens": 0, "completionTokens": 0},
+        "isContinued": False,
+    },
+)
+# Finish message: code d
+FINISH_MESSAGE_PART = format_data_stream_part(
+    b"d",
+    {
+        "finishReason": "stop",
+        "usage": {"promptTokens": 0, "completionTokens": 0},
+    },
+)
+
+
+def _text_parts(event: StreamEvent, state: DataStreamState) -> list[bytes]:
+    """Text content: code 0."""
+    if not event.text:
+        return []
+    return [format_data_stream_part(b"0", event.text)]
+
+
+def _tool_start_parts(event: StreamEvent, state: DataStreamState) -> list[bytes]:
+    """Tool call streaming start (b) followed by the full tool call with args (9)."""
+    return [
+        format_data_stream_part(
+            b"b",
+            {
+                "toolCallId": event.tool_id,
+                "toolName": event.tool_name,
+            },
+        ),
+        format_data_stream_part(
+            b"9",
+            {
+                "toolCallId": event.tool_id,
+                "toolName": event.tool_name,
+                "args": event.tool_input or {},
+            },
+        ),
+    ]
+
+
+def _user_input_required_parts(event: StreamEvent, state: DataStreamState) -> list[bytes]:
+    """AskUserQuestion as a tool call (b, 9)."""
+    # The SDK input normally carries the questions itself; only build a
+    # merged dict when it does not
+    tool_input = event.tool_input
+    if tool_input is not None and "questions" in tool_input:
+        args = tool_input
+    else:
+        args = {"questions": event.questions or [], **(tool_input or {})}
+    return [
+        format_data_stream_part(
+            b"b",
+            {
+                "toolCallId": event.tool_id,
+                "toolName": "AskUserQuestion",
+            },
+        ),
+        format_data_stream_part(
+            b"9",
+            {
+                "toolCallId": event.tool_id,
+                "toolName": "AskUserQuestion",
+                "args": args,
+            },
+        ),
+    ]
+
+
+def _tool_result_parts(event: StreamEvent, state: DataStreamState) -> list[bytes]:
+    """Tool result: code a."""
+    return [
+        format_data_stream_part(
+            b"a",
+            {
+                "toolCallId": event.tool_id,
+                "result": event.tool_result if not event.is_error else {"error": event.tool_result},
+            },
+        )
+    ]
+
+
+def _done_parts(event: StreamEvent, state: DataStreamState) -> list[bytes]:
+    """Finish step (e), finish message (d) and session info as data (2)."""
+    # Finish step and finish message are constant
+    parts = [FINISH_STEP_PART, FINISH_MESSAGE_PART]
+    if state.session_id:
+        parts.append(
+            format_data_stream_part(
+                b"2",
+                [
+                    {
+                        "session_id": state.session_id,
+                        "cost": event.cost,
+                    }
+                ],
+            )
+        )
+    return parts
+
+
+def _error_parts(event: StreamEvent, state: DataStreamState) -> list[bytes]:
+    """Error: code 3."""
+    return [format_data_stream_part(b"3", event.text or "Unknown error")]
 
 
-def convert_to_data_stream(event: StreamEvent, state: DataStreamState) -> list[str]:
+def _no_parts(event: StreamEvent, state: DataStreamState) -> list[bytes]:
+    """Unknown event types produce no output."""
+    return []
+
+
+_PartsHandler = Callable[[StreamEvent, DataStreamState], list[bytes]]
+
+# Event type -> Data Stream part builder
+_PARTS_HANDLERS: dict[str, _PartsHandler] = {
+    "text": _text_parts,
+    "tool_start": _tool_start_parts,
+    "user_input_required": _user_input_required_parts,
+    "tool_result": _tool_result_parts,
+    "done": _done_parts,
+    "error": _error_parts,
+}
+
+
+def convert_to_data_stream(event: StreamEvent, state: DataStreamState) -> list[bytes]:
     """Convert internal StreamEvent to AI SDK Data Stream Protocol parts.
 
     Args:
@@ -79,122 +228,13 @@ def convert_to_data_stream(event: StreamEvent, state: DataStreamState) -> list[s
         state: Mutable state tracking session info.
 
     Returns:
-        List of Data Stream formatted strings.
+        List of Data Stream formatted parts.
     """
-    parts: list[str] = []
-
     # Track session_id
     if event.session_id:
         state.session_id = event.session_id
 
-    if event.type == "text":
-        # Text content: code 0
-        if event.text:
-            parts.append(format_data_stream_part("0", event.text))
-
-    elif event.type == "tool_start":
-        # Tool call streaming start: code b
-        parts.append(
-            format_data_stream_part(
-                "b",
-                {
-                    "toolCallId": event.tool_id,
-                    "toolName": event.tool_name,
-                },
-            )
-        )
-        # Full tool call with args: code 9
-        parts.append(
-            format_data_stream_part(
-                "9",
-                {
-                    "toolCallId": event.tool_id,
-                    "toolName": event.tool_name,
-                    "args": event.tool_input or {},
-                },
-            )
-        )
-
-    elif event.type == "user_input_required":
-        # AskUserQuestion as a tool call
-        parts.append(
-            format_data_stream_part(
-                "b",
-                {
-                    "toolCallId": event.tool_id,
-                    "toolName": "AskUserQuestion",
-                },
-            )
-        )
-        parts.append(
-            format_data_stream_part(
-                "9",
-                {
-                    "toolCallId": event.tool_id,
-                    "toolName": "AskUserQuestion",
-                    "args": {
-                        "questions": event.questions or [],
-                        **(event.tool_input or {}),
-                    },
-                },
-            )
-        )
-
-    elif event.type == "tool_result":
-        # Tool result: code a
-        parts.append(
-            format_data_stream_part(
-                "a",
-                {
-                    "toolCallId": event.tool_id,
-                    "result": event.tool_result
-                    if not event.is_error
-                    else {"error": event.tool_result},
-                },
-            )
-        )
-
-    elif event.type == "done":
-        # Finish step: code e
-        parts.append(
-            format_data_stream_part(
-                "e",
-                {
-                    "finishReason": "stop",
-                    "usage": {"promptTokens": 0, "completionTokens": 0},
-                    "isContinued": False,
-                },
-            )
-        )
-        # Finish message: code d (includes session metadata)
-        parts.append(
-            format_data_stream_part(
-                "d",
-                {
-                    "finishReason": "stop",
-                    "usage": {"promptTokens": 0, "completionTokens": 0},
-                },
-            )
-        )
-        # Send session info as data: code 2
-        if state.session_id:
-            parts.append(
-                format_data_stream_part(
-                    "2",
-                    [
-                        {
-                            "session_id": state.session_id,
-                            "cost": event.cost,
-                        }
-                    ],
-                )
-            )
-
-    elif event.type == "error":
-        # Error: code 3
-        parts.append(format_data_stream_part("3", event.text or "Unknown error"))
-
-    return parts
+    return _PARTS_HANDLERS.get(event.type, _no_parts)(event, state)
 
 
 def get_agent_manager() -> AgentManager:
@@ -227,9 +267,13 @@ class ChatRequest(BaseModel):
 
     def get_user_message(self) -> str:
         """Extract the user message from either format."""
-        # If using Vercel format (messages array), get the last user message
+        # If using Vercel format (messages array), get the last user message;
+        # it is almost always the final entry, so check that first
         if self.messages:
-            for msg in reversed(self.messages):
+            last = self.messages[-1]
+            if last.role == "user":
+                return last.content
+            for msg in reversed(self.messages[:-1]):
                 if msg.role == "user":
                     return msg.content
             raise ValueError("No user message found in messages array")
@@ -250,29 +294,32 @@ class UserResponse(BaseModel):
 
 async def stream_agent_response_data_stream(
     message: str, session_id: str | None = None
-) -> AsyncIterator[tuple[str, str | None]]:
+) -> AsyncGenerator[bytes, None]:
     """Stream agent response as AI SDK Data Stream protocol.
 
+    All parts produced by one event are joined into a single chunk, so each
+    event costs one write to the response rather than one per part.
+
     Args:
         message: The user's message.
         session_id: Optional session ID to continue an existing conversation.
 
     Yields:
-        Tuples of (Data Stream formatted string, session_id or None).
+        Data Stream formatted chunks.
     """
     manager = get_agent_manager()
     state = DataStreamState()
 
     try:
-        async for event in manager.stream_response(message, session_id):
-            parts = convert_to_data_stream(event, state)
-            for part in parts:
-                yield part, state.session_id
+        # aclosing finalizes the agent stream promptly if the client disconnects
+        async with aclosing(manager.stream_response(message, session_id)) as events:
+            async for event in events:
+                parts = convert_to_data_stream(event, state)
+                if parts:
+                    yield b"".join(parts)
     except Exception as e:
         error_event = StreamEvent(type="error", text=str(e), is_error=True)
-        parts = convert_to_data_stream(error_event, state)
-        for part in parts:
-            yield part, state.session_id
+        yield b"".join(convert_to_data_stream(error_event, state))
 
 
 @router.post("")
@@ -299,24 +346,12 @@ async def chat(request: ChatRequest) -> StreamingResponse:
     if not user_message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
 
-    # Track session_id for header (will be set from first event if new session)
-    captured_session_id: str | None = request.session_id
-
-    async def generate() -> AsyncIterator[str]:
-        nonlocal captured_session_id
-        async for chunk, session_id in stream_agent_response_data_stream(
-            user_message, request.session_id
-        ):
-            if session_id and not captured_session_id:
-                captured_session_id = session_id
-            yield chunk
-
     # Use request session_id for header if available
     # New sessions will have session_id in data event
     headers = get_sse_headers(request.session_id)
 
     return StreamingResponse(
-        generate(),
+        stream_agent_response_data_stream(user_message, request.session_id),
         media_type="text/plain; charset=utf-8",
         headers=headers,
     )
@@ -341,26 +376,25 @@ async def respond(request: UserResponse) -> StreamingResponse:
     manager = get_agent_manager()
     state = DataStreamState()
 
-    async def generate() -> AsyncIterator[str]:
+    async def generate() -> AsyncIterator[bytes]:
         try:
-            async for event in manager.respond_to_prompt(request.session_id, request.response):
-                parts = convert_to_data_stream(event, state)
-                for part in parts:
-                    yield part
+            async with aclosing(
+                manager.respond_to_prompt(request.session_id, request.response)
+            ) as events:
+                async for event in events:
+                    parts = convert_to_data_stream(event, state)
+                    if parts:
+                        yield b"".join(parts)
         except SessionNotFoundError:
             error_event = StreamEvent(
                 type="error",
                 text="Session not found or expired",
                 is_error=True,
             )
-            parts = convert_to_data_stream(error_event, state)
-            for part in parts:
-                yield part
+            yield b"".join(convert_to_data_stream(error_event, state))
         except Exception as e:
             error_event = StreamEvent(type="error", text=str(e), is_error=True)
-            parts = convert_to_data_stream(error_event, state)
-            for part in parts:
-                yield part
+            yield b"".join(convert_to_data_stream(error_event, state))
 
     return StreamingResponse(
         generate(),
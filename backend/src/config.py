@@ -32,7 +32,9 @@ class Settings(BaseSettings):
 
     # Session management
     session_ttl_seconds: int = 3600  # 1 hour default
-    session_cleanup_interval_seconds: int = 300  # 5 minutes
+    session_cleanup_interval_seconds: int = 300  # Min gap between cleanup passes
+    client_pool_size: int = 2  # Pre-connected clients kept warm for new sessions
+    max_sessions: int = 100  # Live sessions before low-value idle ones are evicted
 
     @property
     def allowed_origins(self) -> list[str]:
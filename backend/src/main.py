@@ -9,37 +9,56 @@ import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
+from src.agent.options import get_default_options
 from src.api.routes import chat_router
 from src.api.routes.chat import get_agent_manager
 from src.config import settings
+from src.services.sessions import SessionManager
 
 # Configure logging to show INFO level for all app loggers
 logging.basicConfig(
     level=logging.INFO,
     format="%(levelname)s:%(name)s:%(message)s",
 )
-# Set DEBUG level for our agent client to see detailed logs
-logging.getLogger("src.agent.client").setLevel(logging.DEBUG)
+# Set DEBUG level for our agent client to see detailed per-message logs
+if settings.debug:
+    logging.getLogger("src.agent.client").setLevel(logging.DEBUG)
 
 logger = logging.getLogger(__name__)
 
 
-async def session_cleanup_loop() -> None:
-    """Background task to periodically clean up expired sessions."""
-    while True:
+async def session_cleanup_loop(session_manager: SessionManager, shutdown: asyncio.Event) -> None:
+    """Background task to clean up expired sessions.
+
+    Sleeps until the earliest session can expire rather than polling, but
+    never wakes more often than the configured cleanup interval so expiries
+    are handled in batches. The loop exits once ``shutdown`` is set; a pass
+    already in progress is allowed to finish so client disconnects are never
+    interrupted mid-teardown.
+
+    Args:
+        session_manager: The session manager whose sessions are expired.
+        shutdown: Event set by the lifespan handler to stop the loop.
+    """
+    while not shutdown.is_set():
         try:
-            await asyncio.sleep(settings.session_cleanup_interval_seconds)
-            manager = get_agent_manager()
-            count = await manager.session_manager.cleanup_expired()
+            delay = max(
+                session_manager.next_expiry_delay(),
+                settings.session_cleanup_interval_seconds,
+            )
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(shutdown.wait(), timeout=delay)
+            if shutdown.is_set():
+                break
+            count = await session_manager.cleanup_expired()
             if count > 0:
-                logger.info(f"Cleaned up {count} expired sessions")
-        except asyncio.CancelledError:
-            break
+                logger.info("Cleaned up %s expired sessions", count)
         except Exception as e:
-            logger.error(f"Error in session cleanup: {e}")
+            logger.error("Error in session cleanup: %s", e)
 
 
 @asynccontextmanager
@@ -52,18 +71,27 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Starting AI Chat Platform...")
 
     # Start background session cleanup task
-    cleanup_task = asyncio.create_task(session_cleanup_loop())
+    manager = get_agent_manager()
+    shutdown = asyncio.Event()
+    cleanup_task = asyncio.create_task(session_cleanup_loop(manager.session_manager, shutdown))
+
+    # Pre-connect idle clients so new sessions skip the CLI startup
+    warm_task: asyncio.Task[None] | None = None
+    if settings.is_configured:
+        warm_task = asyncio.create_task(manager.session_manager.warm_pool(get_default_options()))
 
     yield
 
-    # Shutdown: cancel cleanup task and clean up all sessions
+    # Shutdown: stop the cleanup task and clean up all sessions
     logger.info("Shutting down AI Chat Platform...")
-    cleanup_task.cancel()
-    with suppress(asyncio.CancelledError):
-        await cleanup_task
+    shutdown.set()
+    await cleanup_task
+    if warm_task is not None:
+        warm_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warm_task
 
     # Clean up all active sessions
-    manager = get_agent_manager()
     await manager.cleanup()
     logger.info("Shutdown complete")
 
@@ -84,11 +112,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses for clients that accept gzip; since Starlette 1.5
+# streamed chunks are sync-flushed individually, so the data stream stays
+# incremental (older versions buffer it, hence the starlette floor)
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
 # Include routers
 app.include_router(chat_router, prefix="/api/chat", tags=["chat"])
 
 
+# Probed constantly by load balancers, so the response is built once
+_HEALTH_RESPONSE = Response(content=b'{"status":"healthy"}', media_type="application/json")
+
+
 @app.get("/health")
-async def health_check() -> dict[str, str]:
+async def health_check() -> Response:
     """Health check endpoint."""
-    return {"status": "healthy"}
+    return _HEALTH_RESPONSE
@@ -2,10 +2,14 @@
 
 import asyncio
 import logging
-import uuid
-from dataclasses import dataclass, field
+import secrets
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
 from enum import Enum
+from itertools import islice
 
 from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
 
@@ -24,7 +28,7 @@ class SessionState(Enum):
     ERROR = "error"  # Session in error state
 
 
-@dataclass
+@dataclass(slots=True)
 class ManagedSession:
     """A managed ClaudeSDKClient session with metadata."""
 
@@ -32,38 +36,68 @@ class ManagedSession:
     session_id: str
     options: ClaudeAgentOptions
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    last_accessed: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # Monotonic seconds; only compared against other time.monotonic() readings
+    last_accessed: float = field(default_factory=time.monotonic)
     state: SessionState = SessionState.ACTIVE
     user_id: str | None = None
     # Claude Code SDK session ID (returned in ResultMessage)
     sdk_session_id: str = "default"
+    # AskUserQuestion tool IDs in the current response (results are skipped)
+    ask_user_question_ids: set[str] = field(default_factory=set)
+    # Number of queries streamed on this session, used to rank eviction
+    turns: int = 0
 
     def touch(self) -> None:
         """Update last_accessed timestamp."""
-        self.last_accessed = datetime.now(timezone.utc)
+        self.last_accessed = time.monotonic()
 
-    def is_expired(self, ttl_seconds: int) -> bool:
-        """Check if session has expired based on TTL."""
-        now = datetime.now(timezone.utc)
-        age_seconds = (now - self.last_accessed).total_seconds()
-        return age_seconds > ttl_seconds
+    def is_expired(self, ttl_seconds: int, now: float | None = None) -> bool:
+        """Check if session has expired based on TTL.
+
+        Args:
+            ttl_seconds: Time-to-live in seconds.
+            now: Current time.monotonic() reading, to share one across a scan.
+        """
+        if now is None:
+            now = time.monotonic()
+        return now - self.last_accessed > ttl_seconds
 
 
 class SessionManager:
     """Manages ClaudeSDKClient sessions with lifecycle handling.
 
-    Thread-safe session management with TTL-based expiration.
+    Session management with TTL-based expiration. The session dict is only
+    read or mutated between awaits, so those operations are atomic on the
+    event loop and need no lock. Clients are disconnected only after their
+    session has been removed, so slow teardown never blocks other sessions.
+
+    Sessions are kept in access order (least recently used first), so expiry
+    only visits the expired prefix instead of scanning every session.
     """
 
-    def __init__(self, ttl_seconds: int = 3600) -> None:
+    # Fraction of least recently used sessions considered for eviction
+    EVICTION_SAMPLE_FRACTION = 0.1
+    # Seconds without a received message after which a streaming session is
+    # presumed stuck and may be evicted like an idle one
+    STALE_STREAMING_SECONDS = 600
+
+    def __init__(self, ttl_seconds: int = 3600, pool_size: int = 0, max_sessions: int = 0) -> None:
         """Initialize the session manager.
 
         Args:
             ttl_seconds: Time-to-live for sessions in seconds (default: 1 hour).
+            pool_size: Number of pre-connected idle clients to keep warm for
+                new sessions (default: 0, pooling disabled).
+            max_sessions: Maximum number of live sessions; creating one past
+                the cap evicts a low-value idle session (default: 0, no cap).
         """
-        self._sessions: dict[str, ManagedSession] = {}
-        self._lock = asyncio.Lock()
+        self._sessions: OrderedDict[str, ManagedSession] = OrderedDict()
         self._ttl_seconds = ttl_seconds
+        self._max_sessions = max_sessions
+        self._pool_size = pool_size
+        self._pool_options: ClaudeAgentOptions | None = None
+        self._idle_clients: list[ClaudeSDKClient] = []
+        self._refill_task: asyncio.Task[None] | None = None
 
     async def create_session(
         self,
@@ -79,11 +113,14 @@ class SessionManager:
         Returns:
             The created ManagedSession.
         """
-        session_id = str(uuid.uuid4())
+        session_id = secrets.token_hex(16)
 
-        # Create and connect the client
-        client = ClaudeSDKClient(options=options)
-        await client.connect()
+        # Lease a pre-connected client when the options match the warm pool,
+        # otherwise create and connect one
+        client = self._lease_pooled_client(options)
+        if client is None:
+            client = ClaudeSDKClient(options=options)
+            await client.connect()
 
         session = ManagedSession(
             client=client,
@@ -92,35 +129,141 @@ class SessionManager:
             user_id=user_id,
         )
 
-        async with self._lock:
-            self._sessions[session_id] = session
+        evicted = self._evict_for_capacity()
+        self._sessions[session_id] = session
 
-        logger.info(f"Created session {session_id}")
+        logger.info("Created session %s", session_id)
+        if evicted is not None:
+            await self._cleanup_session(evicted)
         return session
 
+    def _evict_for_capacity(self) -> ManagedSession | None:
+        """Unlink one low-value session if the manager is at capacity.
+
+        Only the least recently used tail is sampled. Within it the session
+        with the fewest turns goes first, so one-shot sessions (e.g. from
+        bots) are evicted before idle but established conversations.
+        Streaming sessions are skipped unless they are stale; if the whole
+        sample is streaming, the least recently used evictable session past
+        it goes instead.
+
+        Returns:
+            The unlinked session, whose client the caller must disconnect.
+        """
+        if not self._max_sessions or len(self._sessions) < self._max_sessions:
+            return None
+
+        now = time.monotonic()
+        sessions = self._sessions.values()
+        sample_size = max(1, int(len(self._sessions) * self.EVICTION_SAMPLE_FRACTION))
+        candidates = [
+            session for session in islice(sessions, sample_size) if self._is_evictable(session, now)
+        ]
+        victim: ManagedSession | None
+        if candidates:
+            # min() keeps the first of equal scores, i.e. the least recently used
+            victim = min(candidates, key=lambda session: session.turns)
+        else:
+            victim = next(
+                (
+                    session
+                    for session in islice(sessions, sample_size, None)
+                    if self._is_evictable(session, now)
+                ),
+                None,
+            )
+        if victim is None:
+            logger.warning(
+                "All %s sessions are streaming; exceeding the cap of %s",
+                len(self._sessions),
+                self._max_sessions,
+            )
+            return None
+
+        del self._sessions[victim.session_id]
+        logger.info("Evicted session %s (%s turns) at capacity", victim.session_id, victim.turns)
+        return victim
+
+    def _is_evictable(self, session: ManagedSession, now: float) -> bool:
+        """Whether a session may be evicted: not streaming, or streaming but stale."""
+        return (
+            session.state is not SessionState.STREAMING
+            or now - session.last_accessed > self.STALE_STREAMING_SECONDS
+        )
+
+    async def warm_pool(self, options: ClaudeAgentOptions) -> None:
+        """Pre-connect idle clients for sessions created with these options.
+
+        Pooled clients are only ever handed out once; clients of deleted or
+        expired sessions are disconnected rather than returned, so no
+        conversation state is shared between sessions.
+
+        Args:
+            options: The options new sessions are expected to use.
+        """
+        self._pool_options = options
+        # Awaiting the task means cancelling this call cancels the warm-up
+        await self._start_refill()
+
+    def _lease_pooled_client(self, options: ClaudeAgentOptions) -> ClaudeSDKClient | None:
+        """Take an idle pre-connected client if one matches the options."""
+        if not self._idle_clients or options != self._pool_options:
+            return None
+
+        client = self._idle_clients.pop()
+        self._start_refill()
+        return client
+
+    def _start_refill(self) -> asyncio.Task[None]:
+        """Return the running refill task, starting one if none is running.
+
+        Only one refill loop may run at a time, otherwise concurrent loops
+        all see the pool short and overfill it.
+        """
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill_pool())
+        return self._refill_task
+
+    async def _refill_pool(self) -> None:
+        """Connect new idle clients until the pool is full."""
+        while self._pool_options is not None and len(self._idle_clients) < self._pool_size:
+            client = ClaudeSDKClient(options=self._pool_options)
+            try:
+                await client.connect()
+            except Exception as e:
+                logger.warning("Error pre-connecting pooled client: %s", e)
+                await self._disconnect_quietly(client)
+                return
+            except BaseException:
+                # Cancelled mid-connect: don't leak a half-started CLI process
+                await self._disconnect_quietly(client)
+                raise
+            self._idle_clients.append(client)
+
+    async def _disconnect_quietly(self, client: ClaudeSDKClient) -> None:
+        """Disconnect a client that never joined the pool, ignoring errors."""
+        with suppress(Exception):
+            await client.disconnect()
+
     async def get_session(self, session_id: str) -> ManagedSession | None:
         """Retrieve an existing session.
 
+        Expired sessions are reported as missing but left for the background
+        ``cleanup_expired`` pass to disconnect, keeping client teardown off
+        the request path.
+
         Args:
             session_id: The session ID to look up.
 
         Returns:
             The ManagedSession if found and not expired, None otherwise.
         """
-        async with self._lock:
-            session = self._sessions.get(session_id)
-            if session is None:
-                return None
+        session = self._sessions.get(session_id)
+        if session is None or session.is_expired(self._ttl_seconds):
+            return None
 
-            if session.is_expired(self._ttl_seconds):
-                # Clean up expired session
-                await self._cleanup_session(session)
-                del self._sessions[session_id]
-                logger.info(f"Session {session_id} expired and cleaned up")
-                return None
-
-            session.touch()
-            return session
+        self._touch(session)
+        return session
 
     async def delete_session(self, session_id: str) -> bool:
         """Explicitly delete a session.
@@ -131,14 +274,58 @@ class SessionManager:
         Returns:
             True if session was found and deleted, False otherwise.
         """
-        async with self._lock:
-            session = self._sessions.pop(session_id, None)
-            if session is None:
-                return False
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+
+        await self._cleanup_session(session)
+        logger.info("Deleted session %s", session_id)
+        return True
+
+    async def reconnect_session(self, session_id: str) -> None:
+        """Replace a session's client with a fresh one resuming its conversation.
+
+        Used when a response was not read through to its result: the old
+        client may still hold the rest of it, which the next query would
+        otherwise receive first. The session itself, and with it the SDK
+        conversation, is kept and made ready for queries again.
+
+        Args:
+            session_id: The session ID to reconnect. Sessions deleted or
+                evicted in the meantime are left alone.
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+
+        options = session.options
+        if session.sdk_session_id != "default":
+            options = replace(options, resume=session.sdk_session_id)
+        old_client, session.client = session.client, ClaudeSDKClient(options=options)
+        session.state = SessionState.ACTIVE
+
+        try:
+            await old_client.disconnect()
+        except Exception as e:
+            logger.warning("Error disconnecting session %s: %s", session_id, e)
+        try:
+            await session.client.connect()
+        except Exception as e:
+            logger.warning("Error reconnecting session %s: %s", session_id, e)
+            return
+        logger.info("Reconnected session %s with resume=%s", session_id, options.resume)
 
-            await self._cleanup_session(session)
-            logger.info(f"Deleted session {session_id}")
-            return True
+    def next_expiry_delay(self) -> float:
+        """Seconds until the earliest session can expire.
+
+        The least recently used session expires first, and any session
+        created or touched later expires no earlier than it, so nothing can
+        expire before this delay elapses. With no sessions this is the TTL.
+        """
+        oldest = next(iter(self._sessions.values()), None)
+        if oldest is None:
+            return float(self._ttl_seconds)
+        return max(0.0, oldest.last_accessed + self._ttl_seconds - time.monotonic())
 
     async def cleanup_expired(self) -> int:
         """Remove sessions older than TTL.
@@ -146,20 +333,22 @@ class SessionManager:
         Returns:
             Number of sessions removed.
         """
-        expired_ids: list[str] = []
-
-        async with self._lock:
-            for session_id, session in self._sessions.items():
-                if session.is_expired(self._ttl_seconds):
-                    expired_ids.append(session_id)
-
-            for session_id in expired_ids:
-                session = self._sessions.pop(session_id)
-                await self._cleanup_session(session)
-
-        if expired_ids:
-            logger.info(f"Cleaned up {len(expired_ids)} expired sessions")
-        return len(expired_ids)
+        # Sessions are in access order, so stop at the first live one.
+        # Unlink expired sessions first, then disconnect their clients.
+        now = time.monotonic()
+        expired: list[ManagedSession] = []
+        for session in self._sessions.values():
+            if not session.is_expired(self._ttl_seconds, now):
+                break
+            expired.append(session)
+        for session in expired:
+            del self._sessions[session.session_id]
+
+        await asyncio.gather(*(self._cleanup_session(session) for session in expired))
+
+        if expired:
+            logger.info("Cleaned up %s expired sessions", len(expired))
+        return len(expired)
 
     async def cleanup_all(self) -> int:
         """Clean up all sessions (for shutdown).
@@ -167,13 +356,25 @@ class SessionManager:
         Returns:
             Number of sessions cleaned up.
         """
-        async with self._lock:
-            count = len(self._sessions)
-            for session in self._sessions.values():
-                await self._cleanup_session(session)
-            self._sessions.clear()
-
-        logger.info(f"Cleaned up all {count} sessions")
+        self._pool_options = None
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._refill_task
+
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        count = len(sessions)
+        await asyncio.gather(*(self._cleanup_session(session) for session in sessions))
+
+        idle_clients, self._idle_clients = self._idle_clients, []
+        for client in idle_clients:
+            try:
+                await client.disconnect()
+            except Exception as e:
+                logger.warning("Error disconnecting pooled client: %s", e)
+
+        logger.info("Cleaned up all %s sessions", count)
         return count
 
     async def _cleanup_session(self, session: ManagedSession) -> None:
@@ -185,7 +386,7 @@ class SessionManager:
         try:
             await session.client.disconnect()
         except Exception as e:
-            logger.warning(f"Error disconnecting session {session.session_id}: {e}")
+            logger.warning("Error disconnecting session %s: %s", session.session_id, e)
 
     def get_session_count(self) -> int:
         """Get the current number of active sessions."""
@@ -201,9 +402,23 @@ class SessionManager:
         Raises:
             SessionNotFoundError: If session is not found.
         """
-        async with self._lock:
-            session = self._sessions.get(session_id)
-            if session is None:
-                raise SessionNotFoundError(f"Session {session_id} not found")
-            session.state = state
-            session.touch()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(f"Session {session_id} not found")
+        if state is SessionState.STREAMING:
+            session.turns += 1
+        session.state = state
+        self._touch(session)
+
+    def touch_session(self, session: ManagedSession) -> None:
+        """Record progress on a session, e.g. a message received while streaming.
+
+        Sessions deleted or evicted in the meantime are ignored.
+        """
+        if self._sessions.get(session.session_id) is session:
+            self._touch(session)
+
+    def _touch(self, session: ManagedSession) -> None:
+        """Mark a session as just accessed, keeping access order intact."""
+        session.touch()
+        self._sessions.move_to_end(session.session_id)
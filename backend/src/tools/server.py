@@ -1,14 +1,20 @@
 """MCP server configuration for custom tools."""
 
+from functools import lru_cache
+
 from claude_agent_sdk import create_sdk_mcp_server
 from claude_agent_sdk.types import McpSdkServerConfig
 
 from src.tools.echo import echo_tool
 
 
+@lru_cache(maxsize=1)
 def create_tools_server() -> McpSdkServerConfig:
     """Create the in-process MCP server with custom tools.
 
+    The server only holds tool registrations, so one instance is built and
+    shared by every session.
+
     Returns:
         McpSdkServerConfig configured with all custom tools.
     """
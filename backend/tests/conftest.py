@@ -1,9 +1,31 @@
 """Pytest configuration and fixtures."""
 
 import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from tests.helpers import FakeAgentManager
 
 
 @pytest.fixture
 def sample_prompt() -> str:
     """Provide a sample prompt for testing."""
     return "What is 2 + 2?"
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    """Create a test client for the FastAPI app, shared by all tests.
+
+    The client is not entered as a context manager, so the app lifespan
+    (cleanup loop, client pool) never runs under test.
+    """
+    return TestClient(app)
+
+
+@pytest.fixture
+def fake_manager(monkeypatch: pytest.MonkeyPatch) -> FakeAgentManager:
+    """Route the chat endpoints to a FakeAgentManager."""
+    manager = FakeAgentManager()
+    monkeypatch.setattr("src.api.routes.chat.get_agent_manager", lambda: manager)
+    return manager
@@ -0,0 +1,14 @@
+"""Shared test doubles."""
+
+from collections.abc import AsyncIterator, Callable
+
+from src.agent.client import StreamEvent
+
+
+class FakeAgentManager:
+    """Stand-in for AgentManager; tests assign the stream methods they need."""
+
+    __slots__ = ("stream_response", "respond_to_prompt")
+
+    stream_response: Callable[..., AsyncIterator[StreamEvent]]
+    respond_to_prompt: Callable[..., AsyncIterator[StreamEvent]]
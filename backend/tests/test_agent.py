@@ -1,7 +1,24 @@
 """Test agent module."""
 
-from src.agent.client import AgentManager, AgentRunner, StreamEvent
+import dataclasses
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from claude_agent_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+from src.agent.client import AgentManager, AgentRunner, StreamEvent, serialize_tool_content
 from src.agent.options import get_default_options
+from src.services.sessions import ManagedSession, SessionState
 
 
 def test_agent_manager_instantiates() -> None:
@@ -27,6 +44,12 @@ def test_default_options_valid() -> None:
     assert "Bash" in options.allowed_tools
 
 
+def test_default_options_cached() -> None:
+    """Verify default options are built once per flag combination."""
+    assert get_default_options() is get_default_options()
+    assert get_default_options(include_hooks=True) is not get_default_options()
+
+
 def test_stream_event_text() -> None:
     """Verify StreamEvent can represent text."""
     event = StreamEvent(type="text", text="Hello, world!")
@@ -34,6 +57,14 @@ def test_stream_event_text() -> None:
     assert event.text == "Hello, world!"
 
 
+def test_stream_event_immutable() -> None:
+    """Verify StreamEvent is frozen and slotted."""
+    event = StreamEvent(type="text", text="Hello")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        event.text = "changed"  # type: ignore[misc]
+    assert not hasattr(event, "__dict__")
+
+
 def test_stream_event_tool_start() -> None:
     """Verify StreamEvent can represent tool start."""
     event = StreamEvent(
@@ -83,3 +114,262 @@ def test_stream_event_tool_result() -> None:
     assert event.type == "tool_result"
     assert event.tool_result == "File contents here"
     assert event.is_error is False
+
+
+def _make_session(*messages: Any) -> ManagedSession:
+    """Create a ManagedSession whose client replays the given SDK messages."""
+
+    async def receive_response() -> AsyncIterator[Any]:
+        for message in messages:
+            yield message
+
+    client = MagicMock()
+    client.receive_response = receive_response
+    return ManagedSession(client=client, session_id="session-123", options=MagicMock())
+
+
+async def _collect(manager: AgentManager, session: ManagedSession) -> list[StreamEvent]:
+    """Drain _process_response into a list."""
+    return [event async for event in manager._process_response(session)]
+
+
+@pytest.mark.asyncio
+async def test_process_response_dispatches_message_types() -> None:
+    """Verify each SDK message type maps to the expected StreamEvents."""
+    manager = AgentManager()
+    manager.session_manager.set_session_state = AsyncMock()  # type: ignore[method-assign]
+    session = _make_session(
+        AssistantMessage(
+            content=[
+                TextBlock(text="Reading"),
+                ToolUseBlock(id="tool-1", name="Read", input={"file_path": "/a"}),
+            ],
+            model="claude",
+        ),
+        UserMessage(content=[ToolResultBlock(tool_use_id="tool-1", content="data")]),
+        ResultMessage(
+            subtype="success",
+            duration_ms=1,
+            duration_api_ms=1,
+            is_error=False,
+            num_turns=1,
+            session_id="sdk-abc",
+            total_cost_usd=0.01,
+        ),
+    )
+
+    events = await _collect(manager, session)
+
+    assert [e.type for e in events] == ["text", "tool_start", "tool_result", "done"]
+    assert events[2].tool_result == "data"
+    assert events[3].cost == 0.01
+    assert session.sdk_session_id == "sdk-abc"
+
+
+@pytest.mark.asyncio
+async def test_process_response_skips_ask_user_question_result() -> None:
+    """Verify AskUserQuestion emits user_input_required and hides its result."""
+    manager = AgentManager()
+    manager.session_manager.set_session_state = AsyncMock()  # type: ignore[method-assign]
+    questions = [{"question": "What color?"}]
+    session = _make_session(
+        AssistantMessage(
+            content=[
+                ToolUseBlock(id="ask-1", name="AskUserQuestion", input={"questions": questions})
+            ],
+            model="claude",
+        ),
+        UserMessage(content=[ToolResultBlock(tool_use_id="ask-1", content="answer")]),
+    )
+
+    events = await _collect(manager, session)
+
+    assert [e.type for e in events] == ["user_input_required"]
+    assert events[0].questions == questions
+    manager.session_manager.set_session_state.assert_awaited_once_with(
+        "session-123", SessionState.WAITING_INPUT
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_response_reuses_client_for_existing_session() -> None:
+    """Verify follow-up turns query the same client with the SDK session ID."""
+    manager = AgentManager()
+    session = _make_session()
+    session.client.query = AsyncMock()
+    session.client.disconnect = AsyncMock()
+    session.sdk_session_id = "sdk-abc"
+    manager.session_manager.get_session = AsyncMock(return_value=session)  # type: ignore[method-assign]
+    manager.session_manager.set_session_state = AsyncMock()  # type: ignore[method-assign]
+
+    events = [e async for e in manager.stream_response("Next question", "session-123")]
+
+    assert events == []
+    session.client.query.assert_awaited_once_with("Next question", session_id="sdk-abc")
+    session.client.disconnect.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_resume_session_starts_client_with_resume() -> None:
+    """Verify resume_session creates a session resuming the SDK conversation."""
+    manager = AgentManager()
+    session = _make_session()
+    session.client.query = AsyncMock()
+    manager.session_manager.create_session = AsyncMock(return_value=session)  # type: ignore[method-assign]
+    manager.session_manager.set_session_state = AsyncMock()  # type: ignore[method-assign]
+
+    events = [e async for e in manager.resume_session("sdk-abc", "Where were we?")]
+
+    assert events == []
+    options = manager.session_manager.create_session.await_args.args[0]
+    assert options.resume == "sdk-abc"
+    assert get_default_options().resume is None
+    session.client.query.assert_awaited_once_with("Where were we?", session_id="sdk-abc")
+
+
+@pytest.mark.asyncio
+async def test_process_response_coalesces_adjacent_text_blocks() -> None:
+    """Verify adjacent text blocks merge while keeping tool ordering."""
+    manager = AgentManager()
+    manager.session_manager.set_session_state = AsyncMock()  # type: ignore[method-assign]
+    session = _make_session(
+        AssistantMessage(
+            content=[
+                TextBlock(text="Hello "),
+                TextBlock(text="world"),
+                ToolUseBlock(id="tool-1", name="Read", input={}),
+                TextBlock(text="Done"),
+            ],
+            model="claude",
+        ),
+    )
+
+    events = await _collect(manager, session)
+
+    assert [(e.type, e.text) for e in events] == [
+        ("text", "Hello world"),
+        ("tool_start", None),
+        ("text", "Done"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_response_emits_empty_text_block() -> None:
+    """Verify an empty text block still produces a text event."""
+    manager = AgentManager()
+    session = _make_session(AssistantMessage(content=[TextBlock(text="")], model="claude"))
+
+    events = await _collect(manager, session)
+
+    assert [(e.type, e.text) for e in events] == [("text", "")]
+
+
+@pytest.mark.asyncio
+async def test_process_response_handles_text_block_subclass() -> None:
+    """Verify text from a TextBlock subclass is not dropped."""
+
+    @dataclasses.dataclass
+    class MyText(TextBlock):
+        pass
+
+    manager = AgentManager()
+    session = _make_session(AssistantMessage(content=[MyText(text="Hi")], model="claude"))
+
+    events = await _collect(manager, session)
+
+    assert [(e.type, e.text) for e in events] == [("text", "Hi")]
+
+
+@pytest.mark.asyncio
+async def test_process_response_propagates_sdk_errors() -> None:
+    """Verify errors raised while receiving reach the consumer."""
+    manager = AgentManager()
+
+    async def receive_response() -> AsyncIterator[Any]:
+        yield AssistantMessage(content=[TextBlock(text="partial")], model="claude")
+        raise RuntimeError("connection lost")
+
+    session = _make_session()
+    session.client.receive_response = receive_response
+
+    events: list[StreamEvent] = []
+    with pytest.raises(RuntimeError, match="connection lost"):
+        async for event in manager._process_response(session):
+            events.append(event)
+
+    assert [e.text for e in events] == ["partial"]
+
+
+class _ScriptedClient:
+    """Client whose responses queue up on one stream, like the SDK transport."""
+
+    def __init__(self, options: Any = None) -> None:
+        self.options = options
+        self.pending: list[Any] = []
+        self.disconnected = False
+
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        self.disconnected = True
+
+    async def query(self, prompt: str, session_id: str = "default") -> None:
+        self.pending += [
+            AssistantMessage(content=[TextBlock(text=f"{prompt}-part1")], model="claude"),
+            AssistantMessage(content=[TextBlock(text=f"{prompt}-part2")], model="claude"),
+            ResultMessage(
+                subtype="success",
+                duration_ms=1,
+                duration_api_ms=1,
+                is_error=False,
+                num_turns=1,
+                session_id="sdk-abc",
+            ),
+        ]
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        while self.pending:
+            message = self.pending.pop(0)
+            yield message
+            if isinstance(message, ResultMessage):
+                return
+
+
+@pytest.mark.asyncio
+async def test_aborted_turn_does_not_leak_into_next_turn(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verify a turn closed early reconnects its client, keeping the conversation."""
+    monkeypatch.setattr("src.services.sessions.ClaudeSDKClient", _ScriptedClient)
+    manager = AgentManager()
+
+    events = [e async for e in manager.stream_response("turn1")]
+    session_id = events[-1].session_id
+    assert session_id is not None
+    session = await manager.session_manager.get_session(session_id)
+    assert session is not None
+    aborted_client = session.client
+
+    stream = manager.stream_response("turn2", session_id)
+    await anext(stream)
+    await stream.aclose()
+
+    assert aborted_client.disconnected
+    assert await manager.session_manager.get_session(session_id) is session
+    assert session.state is SessionState.ACTIVE
+    assert session.client is not aborted_client
+    assert session.client.options.resume == "sdk-abc"
+
+    events = [e async for e in manager.stream_response("turn3", session_id)]
+
+    assert [e.text for e in events if e.type == "text"] == ["turn3-part1", "turn3-part2"]
+    assert events[-1].type == "done"
+
+
+def test_serialize_tool_content() -> None:
+    """Verify tool result content serializes strings, JSON and None."""
+    assert serialize_tool_content("plain") == "plain"
+    assert serialize_tool_content(None) == ""
+    content = [{"type": "text", "text": "Hi"}]
+    assert json.loads(serialize_tool_content(content)) == content
@@ -13,13 +13,6 @@ from src.api.routes.chat import (
     VercelMessage,
     get_sse_headers,
 )
-from src.main import app
-
-
-@pytest.fixture
-def client() -> TestClient:
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
 
 
 class TestChatRequestModel:
@@ -67,6 +60,16 @@ class TestChatRequestModel:
         )
         assert request.get_user_message() == "From messages"
 
+    def test_get_user_message_skips_trailing_assistant(self) -> None:
+        """Falls back to an earlier user message when the last one is not."""
+        request = ChatRequest(
+            messages=[
+                VercelMessage(role="user", content="Question"),
+                VercelMessage(role="assistant", content="Answer"),
+            ]
+        )
+        assert request.get_user_message() == "Question"
+
     def test_get_user_message_no_user_role(self) -> None:
         """Raises ValueError if no user message in array."""
         request = ChatRequest(
@@ -4,35 +4,32 @@ Tests the full flow from API request through to response,
 verifying the AI SDK Data Stream protocol events are produced correctly.
 """
 
-import json
+import asyncio
+import re
+import zlib
+from contextlib import suppress
 from typing import Any
-from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 
 from src.agent.client import StreamEvent
+from src.api.routes.chat import stream_agent_response_data_stream
 from src.main import app
+from tests.helpers import FakeAgentManager
 
+# One Data Stream part per line: "X:<json>"
+_PART_RE = re.compile(rb"^(.):(.*)$", re.MULTILINE)
 
-@pytest.fixture
-def client() -> TestClient:
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
 
-
-def parse_data_stream(response_text: str) -> list[tuple[str, Any]]:
-    """Parse Data Stream response into list of (code, value) tuples."""
+def parse_data_stream(data: bytes) -> list[tuple[str, Any]]:
+    """Parse Data Stream response body into list of (code, value) tuples."""
     parts = []
-    for line in response_text.strip().split("\n"):
-        if line and ":" in line:
-            code = line[0]
-            json_str = line[2:]  # Skip "X:"
-            try:
-                value = json.loads(json_str)
-                parts.append((code, value))
-            except json.JSONDecodeError:
-                pass
+    loads = orjson.loads
+    for match in _PART_RE.finditer(data):
+        with suppress(orjson.JSONDecodeError):
+            parts.append((match.group(1).decode("ascii"), loads(match.group(2))))
     return parts
 
 
@@ -49,7 +46,9 @@ def mock_stream_events(*events: StreamEvent):
 class TestBasicTextResponse:
     """Integration tests for basic text response flow."""
 
-    def test_text_response_streams_correctly(self, client: TestClient) -> None:
+    def test_text_response_streams_correctly(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify text response produces correct Data Stream protocol events."""
         events = [
             StreamEvent(type="text", text="Hello ", session_id="session-123"),
@@ -57,53 +56,51 @@ class TestBasicTextResponse:
             StreamEvent(type="done", session_id="session-123", cost=0.001),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Hello"}]},
-            )
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Hello"}]},
+        )
 
-            assert response.status_code == 200
+        assert response.status_code == 200
 
-            parts = parse_data_stream(response.text)
-            codes = [p[0] for p in parts]
+        parts = parse_data_stream(response.content)
+        codes = [p[0] for p in parts]
 
-            # Should have: text (0, 0), finish_step (e), finish_message (d), data (2)
-            assert codes.count("0") == 2
-            assert "e" in codes
-            assert "d" in codes
+        # Should have: text (0, 0), finish_step (e), finish_message (d), data (2)
+        assert codes.count("0") == 2
+        assert "e" in codes
+        assert "d" in codes
 
-    def test_text_content_preserved(self, client: TestClient) -> None:
+    def test_text_content_preserved(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify text content is preserved in text parts."""
         events = [
             StreamEvent(type="text", text="Test message", session_id="session-123"),
             StreamEvent(type="done", session_id="session-123"),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Hello"}]},
-            )
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Hello"}]},
+        )
 
-            parts = parse_data_stream(response.text)
-            text_parts = [p for p in parts if p[0] == "0"]
-            assert len(text_parts) == 1
-            assert text_parts[0][1] == "Test message"
+        parts = parse_data_stream(response.content)
+        text_parts = [p for p in parts if p[0] == "0"]
+        assert len(text_parts) == 1
+        assert text_parts[0][1] == "Test message"
 
 
 class TestToolCallDisplay:
     """Integration tests for tool call flow."""
 
-    def test_tool_call_shows_start_and_result(self, client: TestClient) -> None:
+    def test_tool_call_shows_start_and_result(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify tool calls emit b (streaming start), 9 (call), a (result)."""
         events = [
             StreamEvent(type="text", text="Let me read that file.", session_id="session-123"),
@@ -125,96 +122,93 @@ class TestToolCallDisplay:
             StreamEvent(type="done", session_id="session-123", cost=0.002),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Read /test.txt"}]},
-            )
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Read /test.txt"}]},
+        )
 
-            assert response.status_code == 200
+        assert response.status_code == 200
 
-            parts = parse_data_stream(response.text)
-            codes = [p[0] for p in parts]
+        parts = parse_data_stream(response.content)
+        codes = [p[0] for p in parts]
 
-            # Verify tool events present
-            assert "b" in codes  # tool call streaming start
-            assert "9" in codes  # tool call
-            assert "a" in codes  # tool result
+        # Verify tool events present
+        assert "b" in codes  # tool call streaming start
+        assert "9" in codes  # tool call
+        assert "a" in codes  # tool result
 
-            # Verify tool call content
-            tool_call = next(p[1] for p in parts if p[0] == "9")
-            assert tool_call["toolName"] == "Read"
-            assert tool_call["toolCallId"] == "tool-001"
-            assert tool_call["args"]["file_path"] == "/test.txt"
+        # Verify tool call content
+        tool_call = next(p[1] for p in parts if p[0] == "9")
+        assert tool_call["toolName"] == "Read"
+        assert tool_call["toolCallId"] == "tool-001"
+        assert tool_call["args"]["file_path"] == "/test.txt"
 
-            # Verify tool result content
-            tool_result = next(p[1] for p in parts if p[0] == "a")
-            assert tool_result["result"] == "File contents here"
+        # Verify tool result content
+        tool_result = next(p[1] for p in parts if p[0] == "a")
+        assert tool_result["result"] == "File contents here"
 
 
 class TestMultiTurnConversation:
     """Integration tests for multi-turn conversation flow."""
 
-    def test_session_id_in_data_event(self, client: TestClient) -> None:
+    def test_session_id_in_data_event(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify session_id is included in data event (code 2)."""
         events = [
             StreamEvent(type="text", text="Hello!", session_id="session-abc"),
             StreamEvent(type="done", session_id="session-abc", cost=0.001),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Hello"}]},
-            )
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Hello"}]},
+        )
 
-            parts = parse_data_stream(response.text)
-            data_event = next((p[1] for p in parts if p[0] == "2"), None)
+        parts = parse_data_stream(response.content)
+        data_event = next((p[1] for p in parts if p[0] == "2"), None)
 
-            assert data_event is not None
-            assert isinstance(data_event, list)
-            assert data_event[0]["session_id"] == "session-abc"
-            assert "cost" in data_event[0]
+        assert data_event is not None
+        assert isinstance(data_event, list)
+        assert data_event[0]["session_id"] == "session-abc"
+        assert "cost" in data_event[0]
 
-    def test_multi_turn_sends_session_id(self, client: TestClient) -> None:
+    def test_multi_turn_sends_session_id(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify second request with session_id continues conversation."""
         events = [
             StreamEvent(type="text", text="I remember!", session_id="session-123"),
             StreamEvent(type="done", session_id="session-123", cost=0.001),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            # Second turn with session_id
-            response = client.post(
-                "/api/chat",
-                json={
-                    "messages": [{"role": "user", "content": "What did I say?"}],
-                    "session_id": "session-123",
-                },
-            )
+        # Second turn with session_id
+        response = client.post(
+            "/api/chat",
+            json={
+                "messages": [{"role": "user", "content": "What did I say?"}],
+                "session_id": "session-123",
+            },
+        )
 
-            assert response.status_code == 200
+        assert response.status_code == 200
 
-            # Verify session_id header is set
-            assert response.headers.get("x-session-id") == "session-123"
+        # Verify session_id header is set
+        assert response.headers.get("x-session-id") == "session-123"
 
 
 class TestAskUserQuestionFlow:
     """Integration tests for AskUserQuestion tool flow."""
 
-    def test_ask_user_question_emits_tool_call(self, client: TestClient) -> None:
+    def test_ask_user_question_emits_tool_call(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify AskUserQuestion emits tool call events with questions."""
         questions = [
             {
@@ -240,72 +234,69 @@ class TestAskUserQuestionFlow:
             # Note: No "done" event - stream pauses waiting for user input
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Help me choose"}]},
-            )
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Help me choose"}]},
+        )
 
-            assert response.status_code == 200
+        assert response.status_code == 200
 
-            parts = parse_data_stream(response.text)
-            codes = [p[0] for p in parts]
+        parts = parse_data_stream(response.content)
+        codes = [p[0] for p in parts]
 
-            # Verify AskUserQuestion tool events
-            assert "b" in codes  # streaming start
-            assert "9" in codes  # tool call
+        # Verify AskUserQuestion tool events
+        assert "b" in codes  # streaming start
+        assert "9" in codes  # tool call
 
-            # Verify questions are included
-            tool_call = next(p[1] for p in parts if p[0] == "9")
-            assert tool_call["toolName"] == "AskUserQuestion"
-            assert "questions" in tool_call["args"]
-            assert len(tool_call["args"]["questions"]) == 1
-            assert tool_call["args"]["questions"][0]["header"] == "Color"
+        # Verify questions are included
+        tool_call = next(p[1] for p in parts if p[0] == "9")
+        assert tool_call["toolName"] == "AskUserQuestion"
+        assert "questions" in tool_call["args"]
+        assert len(tool_call["args"]["questions"]) == 1
+        assert tool_call["args"]["questions"][0]["header"] == "Color"
 
-    def test_respond_endpoint_resumes_after_question(self, client: TestClient) -> None:
+    def test_respond_endpoint_resumes_after_question(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify /api/chat/respond continues paused session."""
         events = [
             StreamEvent(type="text", text="Great choice!", session_id="session-123"),
             StreamEvent(type="done", session_id="session-123", cost=0.001),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
+        async def mock_respond(session_id: str, response: str):
+            for event in events:
+                yield event
 
-            async def mock_respond(session_id: str, response: str):
-                for event in events:
-                    yield event
+        fake_manager.respond_to_prompt = mock_respond
 
-            mock_instance.respond_to_prompt = mock_respond
-            mock_manager.return_value = mock_instance
+        response = client.post(
+            "/api/chat/respond",
+            json={
+                "session_id": "session-123",
+                "response": '{"Which color do you prefer?": "Blue"}',
+            },
+        )
 
-            response = client.post(
-                "/api/chat/respond",
-                json={
-                    "session_id": "session-123",
-                    "response": '{"Which color do you prefer?": "Blue"}',
-                },
-            )
+        assert response.status_code == 200
 
-            assert response.status_code == 200
+        parts = parse_data_stream(response.content)
+        codes = [p[0] for p in parts]
 
-            parts = parse_data_stream(response.text)
-            codes = [p[0] for p in parts]
-
-            # Verify response continues with text and finish
-            assert "0" in codes  # text
-            assert "e" in codes  # finish step
-            assert "d" in codes  # finish message
+        # Verify response continues with text and finish
+        assert "0" in codes  # text
+        assert "e" in codes  # finish step
+        assert "d" in codes  # finish message
 
 
 class TestErrorHandling:
     """Integration tests for error handling."""
 
-    def test_error_response_format(self, client: TestClient) -> None:
+    def test_error_response_format(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify errors produce correct error event format (code 3)."""
         events = [
             StreamEvent(type="text", text="Processing...", session_id="session-123"),
@@ -317,125 +308,206 @@ class TestErrorHandling:
             ),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Do something"}]},
-            )
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Do something"}]},
+        )
 
-            assert response.status_code == 200
+        assert response.status_code == 200
 
-            parts = parse_data_stream(response.text)
-            error_part = next((p for p in parts if p[0] == "3"), None)
+        parts = parse_data_stream(response.content)
+        error_part = next((p for p in parts if p[0] == "3"), None)
 
-            assert error_part is not None
-            assert error_part[1] == "Connection timeout"
+        assert error_part is not None
+        assert error_part[1] == "Connection timeout"
 
-    def test_stream_exception_produces_error_event(self, client: TestClient) -> None:
+    def test_stream_exception_produces_error_event(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
         """Verify exceptions during streaming produce error events."""
 
         async def failing_stream(message: str, session_id: str | None = None):
             yield StreamEvent(type="text", text="Starting...", session_id="session-123")
             raise Exception("Network error")
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = failing_stream
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = failing_stream
+
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Hello"}]},
+        )
+
+        parts = parse_data_stream(response.content)
+        error_part = next((p for p in parts if p[0] == "3"), None)
+
+        assert error_part is not None
+        assert "Network error" in error_part[1]
+
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Hello"}]},
-            )
+@pytest.fixture(scope="class")
+def done_stream_parts(client: TestClient) -> list[tuple[str, Any]]:
+    """Parse one text + done response, shared by the stream termination tests."""
+    manager = FakeAgentManager()
+    manager.stream_response = mock_stream_events(
+        StreamEvent(type="text", text="Done", session_id="session-123"),
+        StreamEvent(type="done", session_id="session-123", cost=0.01),
+    )
 
-            parts = parse_data_stream(response.text)
-            error_part = next((p for p in parts if p[0] == "3"), None)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr("src.api.routes.chat.get_agent_manager", lambda: manager)
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Hello"}]},
+        )
 
-            assert error_part is not None
-            assert "Network error" in error_part[1]
+    return parse_data_stream(response.content)
 
 
 class TestStreamEndsCorrectly:
     """Integration tests for stream termination."""
 
-    def test_stream_ends_with_finish_messages(self, client: TestClient) -> None:
+    def test_stream_ends_with_finish_messages(
+        self, done_stream_parts: list[tuple[str, Any]]
+    ) -> None:
         """Verify stream ends with finish_step (e) and finish_message (d)."""
-        events = [
-            StreamEvent(type="text", text="Done", session_id="session-123"),
-            StreamEvent(type="done", session_id="session-123"),
-        ]
+        codes = [p[0] for p in done_stream_parts]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        # Verify finish events present
+        assert "e" in codes
+        assert "d" in codes
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Hello"}]},
-            )
+    def test_finish_step_before_finish_message(
+        self, done_stream_parts: list[tuple[str, Any]]
+    ) -> None:
+        """Verify finish_step (e) comes before finish_message (d)."""
+        codes = [p[0] for p in done_stream_parts]
 
-            parts = parse_data_stream(response.text)
-            codes = [p[0] for p in parts]
+        # finish_step (e) should come before finish_message (d)
+        e_idx = codes.index("e")
+        d_idx = codes.index("d")
+        assert e_idx < d_idx
 
-            # Verify finish events present
-            assert "e" in codes
-            assert "d" in codes
+    def test_finish_includes_usage(self, done_stream_parts: list[tuple[str, Any]]) -> None:
+        """Verify finish events include usage information."""
+        # Verify finish_step has usage
+        finish_step = next(p[1] for p in done_stream_parts if p[0] == "e")
+        assert "usage" in finish_step
+        assert "finishReason" in finish_step
 
-    def test_finish_step_before_finish_message(self, client: TestClient) -> None:
-        """Verify finish_step (e) comes before finish_message (d)."""
+        # Verify finish_message has usage
+        finish_message = next(p[1] for p in done_stream_parts if p[0] == "d")
+        assert "usage" in finish_message
+        assert "finishReason" in finish_message
+
+
+class TestChunking:
+    """Integration tests for response chunking."""
+
+    @pytest.mark.asyncio
+    async def test_one_chunk_per_event(self, fake_manager: FakeAgentManager) -> None:
+        """Verify all parts of an event are yielded as a single chunk."""
         events = [
-            StreamEvent(type="text", text="Response text", session_id="session-123"),
-            StreamEvent(type="done", session_id="session-123"),
+            StreamEvent(type="tool_start", tool_name="Read", tool_id="t1", session_id="s"),
+            StreamEvent(type="done", session_id="s", cost=0.01),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Hello"}]},
-            )
+        chunks = [chunk async for chunk in stream_agent_response_data_stream("Hello")]
 
-            parts = parse_data_stream(response.text)
-            codes = [p[0] for p in parts]
+        assert len(chunks) == 2
+        assert chunks[0].startswith(b"b:") and b"\n9:" in chunks[0]
+        assert chunks[1].startswith(b"e:") and b"\n2:" in chunks[1]
 
-            # finish_step (e) should come before finish_message (d)
-            e_idx = codes.index("e")
-            d_idx = codes.index("d")
-            assert e_idx < d_idx
+    @pytest.mark.asyncio
+    async def test_closing_stream_closes_agent_stream(self, fake_manager: FakeAgentManager) -> None:
+        """Verify closing the response stream finalizes the agent stream at once."""
+        closed = False
 
-    def test_finish_includes_usage(self, client: TestClient) -> None:
-        """Verify finish events include usage information."""
+        async def stream_response(message: str, session_id: str | None = None):
+            nonlocal closed
+            try:
+                yield StreamEvent(type="text", text="Hello", session_id="s")
+                yield StreamEvent(type="text", text="never sent")
+            finally:
+                closed = True
+
+        fake_manager.stream_response = stream_response
+
+        stream = stream_agent_response_data_stream("Hello")
+        assert (await anext(stream)).startswith(b"0:")
+        await stream.aclose()
+
+        assert closed
+
+
+class TestCompression:
+    """Integration tests for response compression."""
+
+    def test_stream_gzip_encoded_when_accepted(
+        self, client: TestClient, fake_manager: FakeAgentManager
+    ) -> None:
+        """Verify the data stream is gzip-encoded and still parses."""
         events = [
-            StreamEvent(type="text", text="Done", session_id="session-123"),
+            StreamEvent(type="text", text="Hello", session_id="session-123"),
             StreamEvent(type="done", session_id="session-123", cost=0.01),
         ]
 
-        with patch("src.api.routes.chat.get_agent_manager") as mock_manager:
-            mock_instance = MagicMock()
-            mock_instance.stream_response = mock_stream_events(*events)
-            mock_manager.return_value = mock_instance
-
-            response = client.post(
-                "/api/chat",
-                json={"messages": [{"role": "user", "content": "Hello"}]},
-            )
+        fake_manager.stream_response = mock_stream_events(*events)
 
-            parts = parse_data_stream(response.text)
+        response = client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": "Hello"}]},
+            headers={"Accept-Encoding": "gzip"},
+        )
 
-            # Verify finish_step has usage
-            finish_step = next(p[1] for p in parts if p[0] == "e")
-            assert "usage" in finish_step
-            assert "finishReason" in finish_step
+        assert response.headers["content-encoding"] == "gzip"
+        codes = [p[0] for p in parse_data_stream(response.content)]
+        assert codes == ["0", "e", "d", "2"]
 
-            # Verify finish_message has usage
-            finish_message = next(p[1] for p in parts if p[0] == "d")
-            assert "usage" in finish_message
-            assert "finishReason" in finish_message
+    @pytest.mark.asyncio
+    async def test_stream_chunks_flushed_individually(self, fake_manager: FakeAgentManager) -> None:
+        """Verify each gzip-encoded chunk decodes to its parts without the rest."""
+        fake_manager.stream_response = mock_stream_events(
+            StreamEvent(type="text", text="Hello " * 100, session_id="session-123"),
+            StreamEvent(type="text", text="world", session_id="session-123"),
+            StreamEvent(type="done", session_id="session-123", cost=0.01),
+        )
+        body = orjson.dumps({"messages": [{"role": "user", "content": "Hello"}]})
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/chat",
+            "raw_path": b"/api/chat",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"content-type", b"application/json"), (b"accept-encoding", b"gzip")],
+            "server": ("testserver", 80),
+            "client": ("testclient", 50000),
+        }
+        requests = iter([{"type": "http.request", "body": body, "more_body": False}])
+        messages: list[dict[str, Any]] = []
+
+        async def receive() -> dict[str, Any]:
+            message = next(requests, None)
+            if message is None:
+                # Never disconnect; the app finishes the stream on its own
+                await asyncio.Event().wait()
+            return message
+
+        async def send(message: dict[str, Any]) -> None:
+            messages.append(message)
+
+        await app(scope, receive, send)
+
+        start = messages[0]
+        assert (b"content-encoding", b"gzip") in start["headers"]
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = [decompressor.decompress(m["body"]) for m in messages[1:]]
+        assert [c[:2] for c in chunks[:3]] == [b"0:", b"0:", b"e:"]
+        assert parse_data_stream(chunks[1]) == [("0", "world")]
@@ -1,18 +1,24 @@
 """Test configuration loading."""
 
+import pytest
+
 from src.config import Settings
 
 
-def test_settings_loads() -> None:
+@pytest.fixture(scope="module")
+def default_settings() -> Settings:
+    """Settings loaded once from the environment for read-only tests."""
+    return Settings()
+
+
+def test_settings_loads(default_settings: Settings) -> None:
     """Verify settings can be instantiated."""
-    settings = Settings()
-    assert settings.app_name == "AI Chat Platform"
+    assert default_settings.app_name == "AI Chat Platform"
 
 
-def test_settings_default_model() -> None:
+def test_settings_default_model(default_settings: Settings) -> None:
     """Verify default model is set."""
-    settings = Settings()
-    assert "claude" in settings.model.lower()
+    assert "claude" in default_settings.model.lower()
 
 
 def test_settings_is_configured_without_key() -> None:
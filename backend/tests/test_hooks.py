@@ -2,7 +2,7 @@
 
 import pytest
 
-from src.agent.hooks import create_hooks, validate_bash_commands
+from src.agent.hooks import DANGEROUS_PATTERNS, create_hooks, validate_bash_commands
 
 
 @pytest.mark.asyncio
@@ -21,6 +21,17 @@ async def test_blocks_fork_bomb() -> None:
     assert result.get("hookSpecificOutput", {}).get("permissionDecision") == "deny"
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pattern", DANGEROUS_PATTERNS)
+async def test_blocks_every_dangerous_pattern(pattern: str) -> None:
+    """Verify each dangerous pattern is blocked when embedded in a command."""
+    input_data = {"tool_name": "Bash", "tool_input": {"command": f"echo hi && {pattern} x"}}
+    result = await validate_bash_commands(input_data, None, None)  # type: ignore[arg-type]
+    output = result.get("hookSpecificOutput", {})
+    assert output.get("permissionDecision") == "deny"
+    assert pattern in output.get("permissionDecisionReason", "")
+
+
 @pytest.mark.asyncio
 async def test_allows_safe_commands() -> None:
     """Verify safe commands are allowed."""
@@ -29,6 +40,15 @@ async def test_allows_safe_commands() -> None:
     assert result == {}
 
 
+@pytest.mark.asyncio
+async def test_allows_empty_command() -> None:
+    """Verify an empty or missing command is allowed without scanning."""
+    for tool_input in ({"command": ""}, {}):
+        input_data = {"tool_name": "Bash", "tool_input": tool_input}
+        result = await validate_bash_commands(input_data, None, None)  # type: ignore[arg-type]
+        assert result == {}
+
+
 @pytest.mark.asyncio
 async def test_ignores_non_bash_tools() -> None:
     """Verify non-Bash tools are ignored."""
@@ -0,0 +1,32 @@
+"""Tests for application lifecycle tasks."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi.testclient import TestClient
+
+from src.main import session_cleanup_loop
+
+
+async def test_session_cleanup_loop_stops_on_shutdown() -> None:
+    """Verify setting the shutdown event wakes the loop without cancelling it."""
+    session_manager = MagicMock()
+    session_manager.next_expiry_delay.return_value = 3600.0
+    session_manager.cleanup_expired = AsyncMock(return_value=0)
+    shutdown = asyncio.Event()
+
+    task = asyncio.create_task(session_cleanup_loop(session_manager, shutdown))
+    await asyncio.sleep(0)
+    shutdown.set()
+    await asyncio.wait_for(task, timeout=1)
+
+    assert not task.cancelled()
+    session_manager.cleanup_expired.assert_not_called()
+
+
+def test_health_check(client: TestClient) -> None:
+    """Verify the health endpoint returns its JSON status on every call."""
+    for _ in range(2):
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
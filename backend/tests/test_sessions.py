@@ -1,8 +1,8 @@
 """Tests for session management."""
 
 import asyncio
-from datetime import datetime, timedelta, timezone
-from unittest.mock import AsyncMock, MagicMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -10,6 +10,21 @@ from src.agent.exceptions import SessionNotFoundError
 from src.services.sessions import ManagedSession, SessionManager, SessionState
 
 
+@pytest.fixture(autouse=True)
+def mock_client_class(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """Replace ClaudeSDKClient so every new client is an AsyncMock."""
+    client_class = MagicMock(return_value=AsyncMock())
+    monkeypatch.setattr("src.services.sessions.ClaudeSDKClient", client_class)
+    return client_class
+
+
+@pytest.fixture
+def mock_client(mock_client_class: MagicMock) -> AsyncMock:
+    """The client instance handed out by the patched ClaudeSDKClient."""
+    client: AsyncMock = mock_client_class.return_value
+    return client
+
+
 @pytest.fixture
 def session_manager() -> SessionManager:
     """Create a session manager with short TTL for testing."""
@@ -19,6 +34,11 @@ def session_manager() -> SessionManager:
 class TestManagedSession:
     """Tests for ManagedSession dataclass."""
 
+    def test_slotted(self) -> None:
+        """Verify ManagedSession instances carry no per-instance __dict__."""
+        session = ManagedSession(client=MagicMock(), session_id="test-123", options=MagicMock())
+        assert not hasattr(session, "__dict__")
+
     def test_touch_updates_last_accessed(self) -> None:
         """Verify touch() updates the last_accessed timestamp."""
         mock_client = MagicMock()
@@ -50,7 +70,7 @@ class TestManagedSession:
             options=MagicMock(),
         )
         # Set last_accessed to 2 hours ago
-        session.last_accessed = datetime.now(timezone.utc) - timedelta(hours=2)
+        session.last_accessed = time.monotonic() - 2 * 3600
         assert session.is_expired(ttl_seconds=3600) is True
 
 
@@ -59,21 +79,17 @@ class TestSessionManager:
 
     @pytest.mark.asyncio
     async def test_create_session_returns_managed_session(
-        self, session_manager: SessionManager
+        self, session_manager: SessionManager, mock_client: AsyncMock
     ) -> None:
         """Verify create_session returns a ManagedSession."""
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
-
-            session = await session_manager.create_session(mock_options)
+        session = await session_manager.create_session(mock_options)
 
-            assert isinstance(session, ManagedSession)
-            assert session.options == mock_options
-            assert session.state == SessionState.ACTIVE
-            mock_client.connect.assert_called_once()
+        assert isinstance(session, ManagedSession)
+        assert session.options == mock_options
+        assert session.state == SessionState.ACTIVE
+        mock_client.connect.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_create_session_generates_unique_ids(
@@ -82,14 +98,10 @@ class TestSessionManager:
         """Verify each session gets a unique ID."""
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
-
-            session1 = await session_manager.create_session(mock_options)
-            session2 = await session_manager.create_session(mock_options)
+        session1 = await session_manager.create_session(mock_options)
+        session2 = await session_manager.create_session(mock_options)
 
-            assert session1.session_id != session2.session_id
+        assert session1.session_id != session2.session_id
 
     @pytest.mark.asyncio
     async def test_get_session_returns_existing_session(
@@ -98,15 +110,11 @@ class TestSessionManager:
         """Verify get_session returns existing session."""
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
+        created = await session_manager.create_session(mock_options)
+        retrieved = await session_manager.get_session(created.session_id)
 
-            created = await session_manager.create_session(mock_options)
-            retrieved = await session_manager.get_session(created.session_id)
-
-            assert retrieved is not None
-            assert retrieved.session_id == created.session_id
+        assert retrieved is not None
+        assert retrieved.session_id == created.session_id
 
     @pytest.mark.asyncio
     async def test_get_session_returns_none_for_unknown_id(
@@ -121,35 +129,68 @@ class TestSessionManager:
         """Verify get_session updates last_accessed timestamp."""
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
+        created = await session_manager.create_session(mock_options)
+        # Backdate the session instead of sleeping so the timestamps differ
+        original_time = time.monotonic() - 30
+        created.last_accessed = original_time
 
-            created = await session_manager.create_session(mock_options)
-            original_time = created.last_accessed
+        retrieved = await session_manager.get_session(created.session_id)
+        assert retrieved is not None
+        assert retrieved.last_accessed > original_time
 
-            # Small delay to ensure timestamp differs
-            await asyncio.sleep(0.01)
+    @pytest.mark.asyncio
+    async def test_get_session_defers_expired_cleanup(self, mock_client: AsyncMock) -> None:
+        """Verify get_session hides expired sessions without disconnecting them."""
+        manager = SessionManager(ttl_seconds=60)
+        mock_options = MagicMock()
+
+        session = await manager.create_session(mock_options)
+        session.last_accessed = time.monotonic() - 2 * 3600
+
+        assert await manager.get_session(session.session_id) is None
+        mock_client.disconnect.assert_not_called()
 
-            retrieved = await session_manager.get_session(created.session_id)
-            assert retrieved is not None
-            assert retrieved.last_accessed >= original_time
+        assert await manager.cleanup_expired() == 1
+        mock_client.disconnect.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_delete_session_removes_session(self, session_manager: SessionManager) -> None:
+    async def test_delete_session_removes_session(
+        self, session_manager: SessionManager, mock_client: AsyncMock
+    ) -> None:
         """Verify delete_session removes the session."""
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
+        session = await session_manager.create_session(mock_options)
+        deleted = await session_manager.delete_session(session.session_id)
+
+        assert deleted is True
+        assert await session_manager.get_session(session.session_id) is None
+        mock_client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_slow_disconnect_does_not_block_other_sessions(
+        self, session_manager: SessionManager
+    ) -> None:
+        """Verify other sessions stay reachable while a client disconnects."""
+        disconnecting = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_disconnect() -> None:
+            disconnecting.set()
+            await release.wait()
 
-            session = await session_manager.create_session(mock_options)
-            deleted = await session_manager.delete_session(session.session_id)
+        doomed = await session_manager.create_session(MagicMock())
+        other = await session_manager.create_session(MagicMock())
+        doomed.client.disconnect = slow_disconnect
 
-            assert deleted is True
-            assert await session_manager.get_session(session.session_id) is None
-            mock_client.disconnect.assert_called_once()
+        delete_task = asyncio.create_task(session_manager.delete_session(doomed.session_id))
+        await disconnecting.wait()
+
+        assert await session_manager.get_session(other.session_id) is other
+        await session_manager.set_session_state(other.session_id, SessionState.STREAMING)
+
+        release.set()
+        assert await delete_task is True
 
     @pytest.mark.asyncio
     async def test_delete_session_returns_false_for_unknown(
@@ -166,55 +207,75 @@ class TestSessionManager:
         manager = SessionManager(ttl_seconds=0)
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
+        session = await manager.create_session(mock_options)
+        session_id = session.session_id
+
+        # Backdate the session so it is past the TTL
+        session.last_accessed = time.monotonic() - 1
+
+        count = await manager.cleanup_expired()
+
+        assert count == 1
+        assert await manager.get_session(session_id) is None
+
+    @pytest.mark.asyncio
+    async def test_cleanup_expired_follows_access_order(
+        self, session_manager: SessionManager
+    ) -> None:
+        """Verify accessing a session moves it behind idle ones for expiry."""
+        first = await session_manager.create_session(MagicMock())
+        second = await session_manager.create_session(MagicMock())
+
+        # Accessing the first session makes the second least recently used
+        await session_manager.get_session(first.session_id)
+        second.last_accessed = time.monotonic() - 2 * 3600
 
-            session = await manager.create_session(mock_options)
-            session_id = session.session_id
+        assert await session_manager.cleanup_expired() == 1
+        assert await session_manager.get_session(first.session_id) is first
+        assert await session_manager.get_session(second.session_id) is None
 
-            # Wait a tiny bit to ensure session is expired
-            await asyncio.sleep(0.01)
+    @pytest.mark.asyncio
+    async def test_next_expiry_delay_tracks_oldest_session(
+        self, session_manager: SessionManager
+    ) -> None:
+        """Verify the delay is the TTL when empty and shrinks with the LRU session."""
+        assert session_manager.next_expiry_delay() == 60
 
-            count = await manager.cleanup_expired()
+        oldest = await session_manager.create_session(MagicMock())
+        await session_manager.create_session(MagicMock())
+        oldest.last_accessed = time.monotonic() - 45
 
-            assert count == 1
-            assert await manager.get_session(session_id) is None
+        assert 0 < session_manager.next_expiry_delay() <= 15
+
+        oldest.last_accessed = time.monotonic() - 2 * 3600
+        assert session_manager.next_expiry_delay() == 0
 
     @pytest.mark.asyncio
     async def test_cleanup_all_removes_all_sessions(self, session_manager: SessionManager) -> None:
         """Verify cleanup_all removes all sessions."""
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
-
-            await session_manager.create_session(mock_options)
-            await session_manager.create_session(mock_options)
+        await session_manager.create_session(mock_options)
+        await session_manager.create_session(mock_options)
 
-            count = await session_manager.cleanup_all()
+        count = await session_manager.cleanup_all()
 
-            assert count == 2
-            assert session_manager.get_session_count() == 0
+        assert count == 2
+        assert session_manager.get_session_count() == 0
 
     @pytest.mark.asyncio
     async def test_set_session_state_updates_state(self, session_manager: SessionManager) -> None:
         """Verify set_session_state updates the session state."""
         mock_options = MagicMock()
 
-        with patch("src.services.sessions.ClaudeSDKClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value = mock_client
-
-            session = await session_manager.create_session(mock_options)
-            assert session.state == SessionState.ACTIVE
+        session = await session_manager.create_session(mock_options)
+        assert session.state == SessionState.ACTIVE
 
-            await session_manager.set_session_state(session.session_id, SessionState.STREAMING)
+        await session_manager.set_session_state(session.session_id, SessionState.STREAMING)
 
-            updated = await session_manager.get_session(session.session_id)
-            assert updated is not None
-            assert updated.state == SessionState.STREAMING
+        updated = await session_manager.get_session(session.session_id)
+        assert updated is not None
+        assert updated.state == SessionState.STREAMING
 
     @pytest.mark.asyncio
     async def test_set_session_state_raises_for_unknown(
@@ -227,3 +288,193 @@ class TestSessionManager:
     def test_get_session_count(self, session_manager: SessionManager) -> None:
         """Verify get_session_count returns correct count."""
         assert session_manager.get_session_count() == 0
+
+
+class TestClientPool:
+    """Tests for pre-connected client pooling."""
+
+    @pytest.mark.asyncio
+    async def test_create_session_leases_pooled_client(self, mock_client_class: MagicMock) -> None:
+        """Verify sessions with pooled options reuse a pre-connected client."""
+        manager = SessionManager(ttl_seconds=60, pool_size=1)
+        options = MagicMock()
+
+        pooled_client = AsyncMock()
+        mock_client_class.return_value = pooled_client
+        await manager.warm_pool(options)
+        pooled_client.connect.assert_called_once()
+
+        mock_client_class.return_value = AsyncMock()
+        session = await manager.create_session(options)
+
+        assert session.client is pooled_client
+        pooled_client.connect.assert_called_once()
+        await manager.cleanup_all()
+
+    @pytest.mark.asyncio
+    async def test_create_session_skips_pool_for_other_options(
+        self, mock_client_class: MagicMock
+    ) -> None:
+        """Verify sessions with custom options get a fresh client."""
+        manager = SessionManager(ttl_seconds=60, pool_size=1)
+
+        pooled_client = AsyncMock()
+        mock_client_class.return_value = pooled_client
+        await manager.warm_pool(MagicMock())
+
+        fresh_client = AsyncMock()
+        mock_client_class.return_value = fresh_client
+        session = await manager.create_session(MagicMock())
+
+        assert session.client is fresh_client
+        fresh_client.connect.assert_called_once()
+        await manager.cleanup_all()
+        pooled_client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_lease_during_warm_up_does_not_overfill_pool(
+        self, mock_client_class: MagicMock
+    ) -> None:
+        """Verify a lease while the pool warms up reuses the running refill."""
+        manager = SessionManager(ttl_seconds=60, pool_size=2)
+        options = MagicMock()
+        connecting = asyncio.Event()
+        connected = asyncio.Event()
+        clients: list[AsyncMock] = []
+
+        async def slow_connect() -> None:
+            connecting.set()
+            await connected.wait()
+
+        def make_client(options: object) -> AsyncMock:
+            client = AsyncMock()
+            if len(clients) == 1:
+                client.connect.side_effect = slow_connect
+            clients.append(client)
+            return client
+
+        mock_client_class.side_effect = make_client
+        warm_task = asyncio.create_task(manager.warm_pool(options))
+        await connecting.wait()
+
+        session = await manager.create_session(options)
+        connected.set()
+        await warm_task
+
+        assert session.client is clients[0]
+        assert mock_client_class.call_count == 3
+        await manager.cleanup_all()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_warm_up_disconnects_connecting_client(
+        self, mock_client: AsyncMock
+    ) -> None:
+        """Verify cancelling the warm-up mid-connect disconnects that client."""
+        manager = SessionManager(ttl_seconds=60, pool_size=1)
+        connecting = asyncio.Event()
+
+        async def hanging_connect() -> None:
+            connecting.set()
+            await asyncio.Event().wait()
+
+        mock_client.connect.side_effect = hanging_connect
+
+        warm_task = asyncio.create_task(manager.warm_pool(MagicMock()))
+        await connecting.wait()
+        warm_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await warm_task
+
+        mock_client.disconnect.assert_awaited_once()
+        await manager.cleanup_all()
+        mock_client.disconnect.assert_awaited_once()
+
+
+class TestSessionCapacity:
+    """Tests for value-aware eviction at the session cap."""
+
+    @pytest.mark.asyncio
+    async def test_create_session_evicts_fewest_turns_in_lru_tail(self) -> None:
+        """Verify the lowest-turn session among the least recently used goes first."""
+        manager = SessionManager(max_sessions=20)
+
+        sessions = [await manager.create_session(MagicMock()) for _ in range(20)]
+        # The two least recently used sessions form the sampled tail
+        await manager.set_session_state(sessions[0].session_id, SessionState.STREAMING)
+        await manager.set_session_state(sessions[0].session_id, SessionState.ACTIVE)
+        for session in sessions[2:]:
+            await manager.get_session(session.session_id)
+        sessions[0].client = AsyncMock()
+        sessions[1].client = AsyncMock()
+
+        await manager.create_session(MagicMock())
+
+        assert manager.get_session_count() == 20
+        assert await manager.get_session(sessions[0].session_id) is sessions[0]
+        assert await manager.get_session(sessions[1].session_id) is None
+        sessions[1].client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_create_session_evicts_past_streaming_sample(self) -> None:
+        """Verify an idle session past the sample goes when the whole sample is streaming."""
+        manager = SessionManager(max_sessions=20)
+
+        sessions = [await manager.create_session(MagicMock()) for _ in range(20)]
+        # The two least recently used sessions form the sampled tail
+        for session in sessions[:2]:
+            await manager.set_session_state(session.session_id, SessionState.STREAMING)
+        for session in sessions[2:]:
+            await manager.get_session(session.session_id)
+        sessions[2].client = AsyncMock()
+
+        await manager.create_session(MagicMock())
+
+        assert manager.get_session_count() == 20
+        assert await manager.get_session(sessions[0].session_id) is sessions[0]
+        assert await manager.get_session(sessions[1].session_id) is sessions[1]
+        assert await manager.get_session(sessions[2].session_id) is None
+        sessions[2].client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_create_session_evicts_stale_streaming(self) -> None:
+        """Verify a streaming session abandoned past the stale limit can be evicted."""
+        manager = SessionManager(max_sessions=1)
+
+        stale = await manager.create_session(MagicMock())
+        await manager.set_session_state(stale.session_id, SessionState.STREAMING)
+        stale.last_accessed -= SessionManager.STALE_STREAMING_SECONDS + 1
+        stale.client = AsyncMock()
+
+        await manager.create_session(MagicMock())
+
+        assert manager.get_session_count() == 1
+        assert await manager.get_session(stale.session_id) is None
+        stale.client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_touch_session_keeps_long_stream_from_going_stale(self) -> None:
+        """Verify a streaming session that keeps receiving messages is not evicted."""
+        manager = SessionManager(max_sessions=1)
+
+        busy = await manager.create_session(MagicMock())
+        await manager.set_session_state(busy.session_id, SessionState.STREAMING)
+        busy.last_accessed -= SessionManager.STALE_STREAMING_SECONDS + 1
+        manager.touch_session(busy)
+
+        await manager.create_session(MagicMock())
+
+        assert manager.get_session_count() == 2
+        assert await manager.get_session(busy.session_id) is busy
+
+    @pytest.mark.asyncio
+    async def test_create_session_skips_live_streaming(self) -> None:
+        """Verify streaming sessions that are not stale are skipped at capacity."""
+        manager = SessionManager(max_sessions=1)
+
+        busy = await manager.create_session(MagicMock())
+        await manager.set_session_state(busy.session_id, SessionState.STREAMING)
+
+        await manager.create_session(MagicMock())
+
+        assert manager.get_session_count() == 2
+        assert await manager.get_session(busy.session_id) is busy
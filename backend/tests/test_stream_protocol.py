@@ -6,6 +6,8 @@ See: https://ai-sdk.dev/docs/ai-sdk-ui/stream-protocol#data-stream-protocol
 
 import json
 
+import pytest
+
 from src.agent.client import StreamEvent
 from src.api.routes.chat import (
     DataStreamState,
@@ -49,30 +51,30 @@ class TestFormatDataStreamPart:
 
     def test_text_format(self) -> None:
         """Text code 0 with string value."""
-        result = format_data_stream_part("0", "Hello")
-        assert result == '0:"Hello"\n'
+        result = format_data_stream_part(b"0", "Hello")
+        assert result == b'0:"Hello"\n'
 
     def test_error_format(self) -> None:
         """Error code 3 with string value."""
-        result = format_data_stream_part("3", "Something went wrong")
-        assert result == '3:"Something went wrong"\n'
+        result = format_data_stream_part(b"3", "Something went wrong")
+        assert result == b'3:"Something went wrong"\n'
 
     def test_object_format(self) -> None:
         """Object values are JSON serialized."""
-        result = format_data_stream_part("9", {"toolCallId": "call-123", "toolName": "Read"})
+        result = format_data_stream_part(b"9", {"toolCallId": "call-123", "toolName": "Read"})
         parsed = json.loads(result[2:-1])  # Remove "9:" and "\n"
         assert parsed["toolCallId"] == "call-123"
         assert parsed["toolName"] == "Read"
 
     def test_array_format(self) -> None:
         """Array values are JSON serialized."""
-        result = format_data_stream_part("2", [{"key": "value"}])
+        result = format_data_stream_part(b"2", [{"key": "value"}])
         parsed = json.loads(result[2:-1])  # Remove "2:" and "\n"
         assert parsed == [{"key": "value"}]
 
     def test_special_characters_escaped(self) -> None:
         """Special chars in strings are JSON escaped."""
-        result = format_data_stream_part("0", 'Line1\nLine2\t"quoted"')
+        result = format_data_stream_part(b"0", 'Line1\nLine2\t"quoted"')
         # Should be valid, parseable JSON
         json_str = result[2:-1]  # Remove "0:" and "\n"
         parsed = json.loads(json_str)
@@ -80,23 +82,69 @@ class TestFormatDataStreamPart:
 
     def test_unicode_characters(self) -> None:
         """Unicode characters are handled correctly."""
-        result = format_data_stream_part("0", "Hello 世界 🌍")
+        result = format_data_stream_part(b"0", "Hello 世界 🌍")
         json_str = result[2:-1]
         parsed = json.loads(json_str)
         assert parsed == "Hello 世界 🌍"
 
 
-class TestTextEventConversion:
-    """Tests for text event conversion to Data Stream protocol."""
+class TestEventPartCodes:
+    """Tests for the part codes each event type emits."""
+
+    @pytest.mark.parametrize(
+        ("event", "codes"),
+        [
+            pytest.param(StreamEvent(type="text", text="Hello"), [b"0"], id="text"),
+            pytest.param(
+                StreamEvent(
+                    type="tool_start",
+                    tool_name="Read",
+                    tool_id="tool-123",
+                    tool_input={"file_path": "/test.txt"},
+                ),
+                [b"b", b"9"],
+                id="tool_start",
+            ),
+            pytest.param(
+                StreamEvent(
+                    type="tool_result",
+                    tool_id="tool-123",
+                    tool_result="File contents",
+                    is_error=False,
+                ),
+                [b"a"],
+                id="tool_result",
+            ),
+            pytest.param(
+                StreamEvent(
+                    type="user_input_required",
+                    tool_id="ask-123",
+                    questions=[{"question": "What color?", "options": [{"label": "Red"}]}],
+                ),
+                [b"b", b"9"],
+                id="user_input_required",
+            ),
+            pytest.param(
+                StreamEvent(type="done", session_id="session-123", cost=0.001),
+                [b"e", b"d", b"2"],
+                id="done",
+            ),
+            pytest.param(
+                StreamEvent(type="error", text="Connection failed", is_error=True),
+                [b"3"],
+                id="error",
+            ),
+        ],
+    )
+    def test_event_emits_codes(self, event: StreamEvent, codes: list[bytes]) -> None:
+        """Each event type emits its parts in protocol order."""
+        parts = convert_to_data_stream(event, DataStreamState())
 
-    def test_text_emits_code_0(self) -> None:
-        """Text event emits code 0."""
-        state = DataStreamState()
-        event = StreamEvent(type="text", text="Hello")
-        parts = convert_to_data_stream(event, state)
+        assert [part.split(b":", 1)[0] for part in parts] == codes
 
-        assert len(parts) == 1
-        assert parts[0].startswith("0:")
+
+class TestTextEventConversion:
+    """Tests for text event conversion to Data Stream protocol."""
 
     def test_text_content_included(self) -> None:
         """Text content is JSON encoded string."""
@@ -132,21 +180,6 @@ class TestTextEventConversion:
 class TestToolStartConversion:
     """Tests for tool_start event conversion."""
 
-    def test_tool_start_emits_code_b_and_9(self) -> None:
-        """tool_start emits streaming start (b) and tool call (9)."""
-        state = DataStreamState()
-        event = StreamEvent(
-            type="tool_start",
-            tool_name="Read",
-            tool_id="tool-123",
-            tool_input={"file_path": "/test.txt"},
-        )
-        parts = convert_to_data_stream(event, state)
-
-        assert len(parts) == 2
-        assert parts[0].startswith("b:")
-        assert parts[1].startswith("9:")
-
     def test_tool_start_streaming_start_content(self) -> None:
         """Code b includes toolCallId and toolName."""
         state = DataStreamState()
@@ -196,20 +229,6 @@ class TestToolStartConversion:
 class TestToolResultConversion:
     """Tests for tool_result event conversion."""
 
-    def test_tool_result_emits_code_a(self) -> None:
-        """tool_result emits code a."""
-        state = DataStreamState()
-        event = StreamEvent(
-            type="tool_result",
-            tool_id="tool-123",
-            tool_result="File contents",
-            is_error=False,
-        )
-        parts = convert_to_data_stream(event, state)
-
-        assert len(parts) == 1
-        assert parts[0].startswith("a:")
-
     def test_tool_result_includes_result(self) -> None:
         """Result includes toolCallId and result."""
         state = DataStreamState()
@@ -244,21 +263,6 @@ class TestToolResultConversion:
 class TestUserInputRequiredConversion:
     """Tests for user_input_required event conversion."""
 
-    def test_user_input_emits_code_b_and_9(self) -> None:
-        """user_input_required emits as AskUserQuestion tool call."""
-        state = DataStreamState()
-        questions = [{"question": "What color?", "options": [{"label": "Red"}]}]
-        event = StreamEvent(
-            type="user_input_required",
-            tool_id="ask-123",
-            questions=questions,
-        )
-        parts = convert_to_data_stream(event, state)
-
-        assert len(parts) == 2
-        assert parts[0].startswith("b:")
-        assert parts[1].startswith("9:")
-
     def test_user_input_uses_ask_user_question_name(self) -> None:
         """Tool name is AskUserQuestion."""
         state = DataStreamState()
@@ -303,20 +307,25 @@ class TestUserInputRequiredConversion:
         assert parsed["args"]["questions"] == questions
         assert parsed["args"]["metadata"] == "extra"
 
-
-class TestDoneEventConversion:
-    """Tests for done event conversion."""
-
-    def test_done_emits_codes_e_d_and_2(self) -> None:
-        """done emits finish_step (e), finish_message (d), and data (2)."""
+    def test_user_input_passes_sdk_input_through(self) -> None:
+        """tool_input that already holds the questions is sent as args."""
         state = DataStreamState()
-        event = StreamEvent(type="done", session_id="session-123", cost=0.001)
+        questions = [{"question": "Pick one", "options": []}]
+        tool_input = {"questions": questions, "metadata": "extra"}
+        event = StreamEvent(
+            type="user_input_required",
+            tool_id="ask-123",
+            questions=questions,
+            tool_input=tool_input,
+        )
         parts = convert_to_data_stream(event, state)
 
-        assert len(parts) == 3
-        assert parts[0].startswith("e:")
-        assert parts[1].startswith("d:")
-        assert parts[2].startswith("2:")
+        parsed = json.loads(parts[1][2:-1])
+        assert parsed["args"] == tool_input
+
+
+class TestDoneEventConversion:
+    """Tests for done event conversion."""
 
     def test_done_finish_step_content(self) -> None:
         """Finish step (e) includes finishReason, usage, isContinued."""
@@ -358,22 +367,13 @@ class TestDoneEventConversion:
 
         # Should only have finish_step and finish_message
         assert len(parts) == 2
-        assert parts[0].startswith("e:")
-        assert parts[1].startswith("d:")
+        assert parts[0].startswith(b"e:")
+        assert parts[1].startswith(b"d:")
 
 
 class TestErrorEventConversion:
     """Tests for error event conversion."""
 
-    def test_error_emits_code_3(self) -> None:
-        """error emits code 3."""
-        state = DataStreamState()
-        event = StreamEvent(type="error", text="Connection failed", is_error=True)
-        parts = convert_to_data_stream(event, state)
-
-        assert len(parts) == 1
-        assert parts[0].startswith("3:")
-
     def test_error_includes_message(self) -> None:
         """Error message is the value."""
         state = DataStreamState()
@@ -393,6 +393,19 @@ class TestErrorEventConversion:
         assert parsed == "Unknown error"
 
 
+class TestUnknownEventConversion:
+    """Tests for event types without a Data Stream mapping."""
+
+    def test_unknown_type_emits_nothing(self) -> None:
+        """Unknown event types produce no parts but still track the session."""
+        state = DataStreamState()
+        event = StreamEvent(type="heartbeat", session_id="session-123")
+        parts = convert_to_data_stream(event, state)
+
+        assert parts == []
+        assert state.session_id == "session-123"
+
+
 class TestStreamSequence:
     """Tests for complete stream sequences."""
 
@@ -408,10 +421,10 @@ class TestStreamSequence:
         )
 
         # Verify sequence
-        assert parts1[0].startswith("0:")
-        assert parts2[0].startswith("0:")
-        assert parts3[0].startswith("e:")
-        assert parts3[1].startswith("d:")
+        assert parts1[0].startswith(b"0:")
+        assert parts2[0].startswith(b"0:")
+        assert parts3[0].startswith(b"e:")
+        assert parts3[1].startswith(b"d:")
 
     def test_tool_call_sequence(self) -> None:
         """Tool call followed by result sequence."""
@@ -443,7 +456,7 @@ class TestStreamSequence:
         parts3 = convert_to_data_stream(StreamEvent(type="done", session_id="sess-1"), state)
 
         # Verify codes
-        assert parts1[0].startswith("b:")  # streaming start
-        assert parts1[1].startswith("9:")  # tool call
-        assert parts2[0].startswith("a:")  # tool result
-        assert parts3[0].startswith("e:")  # finish step
+        assert parts1[0].startswith(b"b:")  # streaming start
+        assert parts1[1].startswith(b"9:")  # tool call
+        assert parts2[0].startswith(b"a:")  # tool result
+        assert parts3[0].startswith(b"e:")  # finish step
@@ -34,3 +34,8 @@ def test_create_tools_server_returns_config() -> None:
     """Verify create_tools_server returns valid config."""
     config = create_tools_server()
     assert config is not None
+
+
+def test_create_tools_server_cached() -> None:
+    """Verify the tools server is built once and shared."""
+    assert create_tools_server() is create_tools_server()